@@ -2,40 +2,40 @@
 Auth router: email/password + Google OAuth2
 All endpoints return JWT tokens.
 """
-import asyncio
+from typing import Union
 from fastapi import APIRouter, Depends, HTTPException, status, Body
 from fastapi.responses import RedirectResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-import httpx
 from urllib.parse import urlencode
 
-from app.db.session import get_db
+from app.db.session import dialect_insert, get_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserLogin, UserRead, TokenResponse
 from app.core.security import (
-    hash_password, verify_password, encrypt_data, decrypt_data,
+    encrypt_data,
     create_access_token, get_current_user,
 )
+from app.core.principal_cache import Principal, principal_cache
 from app.core.config import settings
+from app.services.google_auth import google_verifier
+from app.services.password_hasher import password_hasher
+from app.services.plaintext_cache import plaintext_cache
 
 router = APIRouter()
 
 
 # ─── Helpers ──────────────────────────────────────────────────
-def _build_user_read(user: User) -> UserRead:
+async def _build_user_read(user: Union[User, Principal]) -> UserRead:
     """Build a UserRead response, decrypting fields as needed."""
+    preferences, struggle_areas = await plaintext_cache.decrypt(
+        "users", [(user.id, user.encrypted_preferences), (user.id, user.encrypted_struggle_areas)]
+    )
     return UserRead(
         id=user.id,
         email=user.email,
-        preferences=(
-            decrypt_data(user.encrypted_preferences.encode("utf-8"))
-            if user.encrypted_preferences else None
-        ),
-        struggle_areas=(
-            decrypt_data(user.encrypted_struggle_areas.encode("utf-8"))
-            if user.encrypted_struggle_areas else None
-        ),
+        preferences=preferences,
+        struggle_areas=struggle_areas,
         granularity_level=user.granularity_level,
         auth_provider=user.auth_provider or "email",
         full_name=user.full_name,
@@ -44,46 +44,57 @@ def _build_user_read(user: User) -> UserRead:
     )
 
 
-def _build_token_response(user: User) -> TokenResponse:
+async def _build_token_response(user: User) -> TokenResponse:
     """Create JWT and wrap it with user data."""
     token = create_access_token({"sub": str(user.id), "email": user.email})
     return TokenResponse(
         access_token=token,
         token_type="bearer",
-        user=_build_user_read(user),
+        user=await _build_user_read(user),
     )
 
 
 async def _get_or_create_social_user(
     db: AsyncSession, email: str, provider: str, provider_id: str, full_name: str = None
 ) -> User:
-    """Find existing user by email or create a new social-login user."""
-    result = await db.execute(select(User).where(User.email == email))
-    user = result.scalar_one_or_none()
-
-    if user:
-        # Update provider info if user originally signed up via email
-        if user.auth_provider == "email" and provider != "email":
-            user.auth_provider = provider
-            user.provider_id = provider_id
-            await db.commit()
-            await db.refresh(user)
+    """
+    Find existing user by email or create a new social-login user.
+    A returning social user is one indexed SELECT: no write, no row lock.
+    Only on a miss, or when an email/password account switches to the
+    social provider, does an INSERT ... ON CONFLICT ... RETURNING run.
+    """
+    user = (await db.execute(select(User).where(User.email == email))).scalar_one_or_none()
+    if user is not None and user.auth_provider != "email":
         return user
 
-    # Create new user
-    user = User(
+    stmt = dialect_insert()(User).values(
         email=email,
         hashed_password=None,
         auth_provider=provider,
-
         provider_id=provider_id,
         full_name=full_name,
         granularity_level=3,
     )
-    db.add(user)
+    # Update provider info only if user originally signed up via email
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[User.email],
+        set_={
+            "auth_provider": stmt.excluded.auth_provider,
+            "provider_id": stmt.excluded.provider_id,
+        },
+        where=User.auth_provider == "email",
+    ).returning(User)
+
+    user = (await db.scalars(stmt, execution_options={"populate_existing": True})).one_or_none()
+    if user is not None:
+        # Inserted, or the provider just switched
+        await db.commit()
+        principal_cache.bump(user.id)
+        return user
+
+    # Lost a race with a concurrent first sign-in: the row exists now
     await db.commit()
-    await db.refresh(user)
-    return user
+    return (await db.execute(select(User).where(User.email == email))).scalar_one()
 
 
 # ─── Email/Password ──────────────────────────────────────────
@@ -94,7 +105,7 @@ async def signup(user_in: UserCreate, db: AsyncSession = Depends(get_db)):
     if result.scalar_one_or_none():
         raise HTTPException(status_code=400, detail="User with this email already exists.")
 
-    hashed_pw = await asyncio.to_thread(hash_password, user_in.password)
+    hashed_pw = await password_hasher.hash(user_in.password)
     user = User(
         email=user_in.email,
         hashed_password=hashed_pw,
@@ -105,7 +116,7 @@ async def signup(user_in: UserCreate, db: AsyncSession = Depends(get_db)):
     db.add(user)
     await db.commit()
     await db.refresh(user)
-    return _build_token_response(user)
+    return await _build_token_response(user)
 
 
 @router.post("/login", response_model=TokenResponse)
@@ -117,22 +128,19 @@ async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
     if not user or not user.hashed_password:
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
-    if not await asyncio.to_thread(verify_password, credentials.password, user.hashed_password):
+    if not await password_hasher.verify(credentials.password, user.hashed_password):
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
-    return _build_token_response(user)
+    return await _build_token_response(user)
 
 
 @router.get("/me", response_model=UserRead)
-async def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: Principal = Depends(get_current_user)):
     """Get the currently authenticated user."""
-    return _build_user_read(current_user)
+    return await _build_user_read(current_user)
 
 
 # ─── Google OAuth2 (Implicit / Token Flow Support) ────────────
-GOOGLE_USERINFO_URL = "https://www.googleapis.com/oauth2/v2/userinfo"
-
-
 @router.post("/google/verify-token", response_model=TokenResponse)
 async def verify_google_token(
     token_data: dict = Body(...), 
@@ -147,17 +155,10 @@ async def verify_google_token(
     if not access_token:
         raise HTTPException(status_code=400, detail="Missing access_token")
 
-    async with httpx.AsyncClient() as client:
-        # Verify token by fetching user info directly from Google
-        userinfo_resp = await client.get(
-            GOOGLE_USERINFO_URL,
-            headers={"Authorization": f"Bearer {access_token}"},
-        )
-        
-        if userinfo_resp.status_code != 200:
-            raise HTTPException(status_code=400, detail="Invalid Google token")
-
-        userinfo = userinfo_resp.json()
+    # Verify token by fetching user info from Google (pooled client, short-TTL cache)
+    userinfo = await google_verifier.userinfo(access_token)
+    if userinfo is None:
+        raise HTTPException(status_code=400, detail="Invalid Google token")
 
     # Ensure the token matches our Client ID (optional extra security check if audience is present, 
     # but for access_tokens we mostly trust the Provider that issued it for us if userinfo succeeds).
@@ -170,4 +171,4 @@ async def verify_google_token(
         provider_id=userinfo["id"], 
         full_name=userinfo.get("name")
     )
-    return _build_token_response(user)
+    return await _build_token_response(user)
@@ -0,0 +1,55 @@
+"""
+Metrics router: in-process counters for capacity planning.
+Values are per worker process.
+"""
+from fastapi import APIRouter
+
+from app.core.principal_cache import principal_cache
+from app.core.static_assets import static_assets
+from app.services.admission import admission
+from app.services.decomposition_cache import decomposition_cache
+from app.services.single_flight import single_flight
+from app.services.llm_resilience import llm_resilience
+from app.services.google_auth import google_verifier
+from app.services.password_hasher import password_hasher
+from app.services.pii_services import pii_scrubber
+from app.services.plaintext_cache import plaintext_cache
+from app.services.change_tracker import sidebar_versions
+from app.services.user_stats import leaderboard
+from app.services import ai_service, progress_reconciler, step_writer
+
+router = APIRouter()
+
+
+@router.get("/")
+async def get_metrics():
+    """Snapshot of LLM admission, caching, coalescing, upstream, auth and static-asset counters."""
+    return {
+        "admission": admission.stats(),
+        "decomposition_cache": decomposition_cache.stats(),
+        "single_flight": single_flight.stats(),
+        "llm_upstream": llm_resilience.stats(),
+        "ai_stream": ai_service.stats(),
+        "pii_scrubber": pii_scrubber.stats(),
+        "plaintext_cache": plaintext_cache.stats(),
+        "principal_cache": principal_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "google_userinfo": google_verifier.stats(),
+        "step_writer": step_writer.stats(),
+        "sidebar_etags": sidebar_versions.stats(),
+        "progress_reconciler": progress_reconciler.stats(),
+        "leaderboard": leaderboard.stats(),
+        "static_assets": static_assets.stats(),
+    }
+
+
+@router.get("/admission")
+async def get_admission_metrics():
+    """Queue depth, active streams, rejections and wait-time percentiles."""
+    return admission.stats()
+
+
+@router.get("/llm")
+async def get_llm_metrics():
+    """Circuit breaker state, retries, TTFT timeouts and hedge-win rate."""
+    return llm_resilience.stats()
@@ -1,19 +1,27 @@
 import asyncio
-from fastapi import APIRouter,Depends, HTTPException, status    
-from fastapi.responses import StreamingResponse
+import json
+from fastapi import APIRouter,Depends, HTTPException, Query, Request, Response, status    
+from fastapi.responses import StreamingResponse, JSONResponse
 from app.schemas.task import TaskCreate
-from app.services.pii_services import scrub_pii
+from app.services.pii_services import pii_scrubber
 from app.services.ai_service import stream_micro_wins
+from app.services.plaintext_cache import plaintext_cache
+from app.services.change_tracker import sidebar_versions
+from app.services.user_stats import record_daily
+from app.services.admission import admission, AdmissionRejected
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.session import get_db
+from app.db.session import get_db, AsyncSessionLocal
 from app.models.task import Task, MicroWinModel
 from app.models.user import User
-from app.core.security import encrypt_data, decrypt_data
-from sqlalchemy import select
+from app.core.config import settings
+from app.core.security import encrypt_data, decrypt_many, get_current_user
+from app.core.readiness import readiness
+from app.core.principal_cache import Principal, principal_cache
+from sqlalchemy import and_, case, func, null, or_, select, update
 from sqlalchemy.orm import selectinload
-from app.schemas.task import TaskRead
-from typing import List
-from datetime import date
+from app.schemas.task import MicroWinBulkUpdate, TaskPage
+from typing import Dict, Optional, Tuple
+from datetime import date, timedelta
 
 router = APIRouter()
 
@@ -22,31 +30,59 @@ async def health_check():
     """Simple health check for Docker HEALTHCHECK."""
     return {"status": "ok"}
 
+@router.get("/ready")
+async def readiness_check():
+    """Readiness probe: 200 only once the NER model and LLM client are warm."""
+    status_body = readiness.status()
+    return JSONResponse(status_body, status_code=200 if status_body["ready"] else 503)
+
 @router.post("/decompose/stream")
 async def decompose_task_stream(
     task_in: TaskCreate, 
     user_id: int, # Ensure this is coming from the request
     db: AsyncSession = Depends(get_db)
 ):
-    # 1. Clean the text (run spaCy in thread to avoid blocking event loop)
-    safe_text = await asyncio.to_thread(scrub_pii, task_in.instruction)
-
-    # 2. Encrypt AND Decode to string
-    # This turns b'gAAAA...' into 'gAAAA...' so the DB doesn't crash
-    encrypted_goal_str = encrypt_data(safe_text).decode('utf-8')
-
-    # 3. Create Task with the correct user_id
-    new_task = Task(
-        encrypted_goal=encrypted_goal_str,
-        user_id=user_id,
-        is_completed=False
-    )
-    db.add(new_task)
-    await db.commit()
-    await db.refresh(new_task)
+    # 0. Admission control before doing any work: capacity, then the user's rate.
+    #    The claim only becomes an upstream slot if the prompt has to reach the model.
+    claim = None
+    try:
+        claim = admission.admit()
+        admission.rate_limit(user_id)
+    except AdmissionRejected as e:
+        if claim is not None:
+            claim.release()
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=e.reason,
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+    try:
+        # 1. Clean the text (micro-batched spaCy, off the event loop)
+        safe_text = await pii_scrubber.scrub(task_in.instruction)
+
+        # 2. Encrypt AND Decode to string
+        # This turns b'gAAAA...' into 'gAAAA...' so the DB doesn't crash
+        encrypted_goal_str = encrypt_data(safe_text).decode('utf-8')
 
+        # 3. Create Task with the correct user_id
+        new_task = Task(
+            encrypted_goal=encrypted_goal_str,
+            user_id=user_id,
+            is_completed=False
+        )
+        db.add(new_task)
+        # The id is set by the INSERT; no refresh, which would re-acquire a connection
+        await db.commit()
+    except BaseException:
+        # Failed before streaming started: give the place back
+        claim.release()
+        raise
+    sidebar_versions.bump(user_id)
+
+    # Holds no DB connection or slot; the claim expires on its own if the body is never read
     return StreamingResponse(
-        stream_micro_wins(safe_text, new_task.id, user_id, db),
+        stream_micro_wins(safe_text, new_task.id, user_id, claim=claim),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -54,50 +90,174 @@ async def decompose_task_stream(
         }
     )
 
-@router.get("/", response_model=List[TaskRead])
-async def get_all_tasks(db: AsyncSession = Depends(get_db)):
+@router.get("/", response_model=TaskPage)
+async def list_tasks(
+    cursor: Optional[int] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(settings.TASK_PAGE_SIZE_DEFAULT, ge=1, le=settings.TASK_PAGE_SIZE_MAX),
+    include_steps: bool = False,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
     """
-    Fetches all tasks and their micro-wins, decrypting the data 
-    before sending it to the frontend.
+    One page of the current user's tasks, newest first.
+    Keyset pagination on Task.id, so every page costs the same
+    however many tasks exist in total.
     """
-    # 1. Fetch tasks with their related micro_wins (ordered by newest first)
-    result = await db.execute(
+    # 1. Fetch one row more than asked for to know whether a next page exists
+    query = (
         select(Task)
-        .options(selectinload(Task.micro_wins))
+        .where(Task.user_id == current_user.id)
         .order_by(Task.id.desc())
+        .limit(limit + 1)
     )
-    tasks = result.scalars().all()
-
-    decrypted_tasks = []
-
-    # 2. Decrypt the data for the response
-    for task in tasks:
-        try:
-            # Decrypt the parent goal
-            plain_goal = decrypt_data(task.encrypted_goal)
-            
-            # Decrypt each individual step
-            decrypted_steps = []
-            for mw in task.micro_wins:
-                decrypted_steps.append({
-                    "id": mw.id,
-                    "step_order": mw.step_order,
-                    "action": decrypt_data(mw.encrypted_action),
-                    "is_completed": mw.is_completed
-                })
-
-            decrypted_tasks.append({
-                "id": task.id,
-                "goal": plain_goal,
-                "is_completed": task.is_completed,
-                "micro_wins": decrypted_steps
-            })
-        except Exception as e:
+    if cursor is not None:
+        query = query.where(Task.id < cursor)
+    if include_steps:
+        query = query.options(selectinload(Task.micro_wins))
+    tasks = (await db.execute(query)).scalars().all()
+
+    next_cursor = None
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        next_cursor = tasks[-1].id
+
+    # 2. Decrypt only this page, all fields in one batch
+    step_lists = [
+        sorted(task.micro_wins, key=lambda mw: mw.step_order or 0) if include_steps else []
+        for task in tasks
+    ]
+    tokens = [task.encrypted_goal for task in tasks]
+    tokens += [mw.encrypted_action for steps in step_lists for mw in steps]
+    plain = iter(await decrypt_many(tokens, strict=False))
+    goals = [next(plain) for _ in tasks]
+
+    items = []
+    for task, goal, steps in zip(tasks, goals, step_lists):
+        actions = [next(plain) for _ in steps]
+        if goal is None or None in actions:
             # If decryption fails (e.g., wrong key), we skip that specific task
-            print(f"Decryption failed for Task {task.id}: {e}")
+            print(f"Decryption failed for Task {task.id}")
             continue
+        items.append({
+            "id": task.id,
+            "title": task.title,
+            "goal": goal,
+            "is_completed": task.is_completed,
+            "steps_total": task.steps_total or 0,
+            "steps_completed": task.steps_completed or 0,
+            "micro_wins": [
+                {
+                    "id": mw.id,
+                    "step_order": mw.step_order,
+                    "action": action,
+                    "is_completed": mw.is_completed,
+                }
+                for mw, action in zip(steps, actions)
+            ],
+        })
+
+    return {"items": items, "next_cursor": next_cursor}
+
+# ─── Streaming Export ─────────────────────────────────────────
+_EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "json": "application/json"}
+
+async def _decrypt_export_task(rows) -> Optional[dict]:
+    """Build one exported task from its joined rows (one row per step)."""
+    head = rows[0]
+    step_rows = [row for row in rows if row.step_id is not None]
+    goal, *actions = await decrypt_many(
+        [head.encrypted_goal] + [row.encrypted_action for row in step_rows], strict=False
+    )
+    if goal is None or None in actions:
+        print(f"Decryption failed for Task {head.id}")
+        return None
+    return {
+        "id": head.id,
+        "title": head.title,
+        "goal": goal,
+        "is_completed": head.is_completed,
+        "steps_total": head.steps_total or 0,
+        "steps_completed": head.steps_completed or 0,
+        "micro_wins": [
+            {
+                "id": row.step_id,
+                "step_order": row.step_order,
+                "action": action,
+                "is_completed": row.step_completed,
+            }
+            for row, action in zip(step_rows, actions)
+        ],
+    }
+
+async def _export_tasks(user_id: int, include_steps: bool):
+    """
+    Yield the user's tasks one at a time, newest first.
+    Rows come through a server-side cursor in TASK_EXPORT_BATCH_SIZE
+    batches, so only the current batch and task are ever held in memory.
+    """
+    columns = [Task.id, Task.title, Task.encrypted_goal, Task.is_completed, Task.steps_total, Task.steps_completed]
+    if include_steps:
+        query = (
+            select(
+                *columns,
+                MicroWinModel.id.label("step_id"),
+                MicroWinModel.step_order,
+                MicroWinModel.encrypted_action,
+                MicroWinModel.is_completed.label("step_completed"),
+            )
+            .outerjoin(MicroWinModel, MicroWinModel.task_id == Task.id)
+            .order_by(Task.id.desc(), MicroWinModel.step_order)
+        )
+    else:
+        query = select(*columns, null().label("step_id")).order_by(Task.id.desc())
+    query = query.where(Task.user_id == user_id).execution_options(yield_per=settings.TASK_EXPORT_BATCH_SIZE)
+
+    # Own session: the stream outlives the request's dependencies
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query)
+        rows = []
+        async for row in result:
+            if rows and rows[0].id != row.id:
+                task = await _decrypt_export_task(rows)
+                if task:
+                    yield task
+                rows = []
+            rows.append(row)
+        if rows:
+            task = await _decrypt_export_task(rows)
+            if task:
+                yield task
+
+async def _export_body(user_id: int, fmt: str, include_steps: bool):
+    if fmt == "json":
+        yield "["
+    first = True
+    async for task in _export_tasks(user_id, include_steps):
+        line = json.dumps(task, separators=(",", ":"))
+        if fmt == "ndjson":
+            yield line + "\n"
+        else:
+            yield line if first else "," + line
+        first = False
+    if fmt == "json":
+        yield "]"
 
-    return decrypted_tasks
+@router.get("/export")
+async def export_tasks(
+    format: str = Query("ndjson", pattern="^(ndjson|json)$"),
+    include_steps: bool = True,
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Download every task of the current user, decrypted, as NDJSON
+    (one task per line) or a single JSON array.  Streamed, so memory
+    stays flat however long the history is.
+    """
+    return StreamingResponse(
+        _export_body(current_user.id, format, include_steps),
+        media_type=_EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="microwin-tasks.{format}"'},
+    )
 
 @router.get("/user/{user_id}")
 async def get_user_sidebar_tasks(user_id: int, db: AsyncSession = Depends(get_db)):
@@ -112,6 +272,54 @@ async def get_user_sidebar_tasks(user_id: int, db: AsyncSession = Depends(get_db
     # Format: [{"id": 1, "title": "House of Cards"}, ...]
     return [{"id": t.id, "title": t.title or "Untitled Task"} for t in tasks]
 
+@router.get("/user/{user_id}/sidebar")
+async def get_user_sidebar_summary(
+    user_id: int,
+    request: Request,
+    cursor: Optional[int] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(settings.TASK_PAGE_SIZE_DEFAULT, ge=1, le=settings.TASK_PAGE_SIZE_MAX),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Sidebar titles plus per-task step progress, newest first, one page at a time.
+    Revalidates with a weak ETag: an unchanged sidebar is a 304 with no query and no body.
+    """
+    etag = sidebar_versions.etag(user_id, cursor or "", limit)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if sidebar_versions.matches(etag, request.headers.get("if-none-match")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    # Progress comes from the tasks' own counters: index-only on the covering (user_id, id DESC) index
+    query = (
+        select(Task.id, Task.title, Task.is_completed, Task.steps_total, Task.steps_completed)
+        .where(Task.user_id == user_id)
+        .order_by(Task.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor is not None:
+        query = query.where(Task.id < cursor)
+    rows = (await db.execute(query)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].id
+
+    body = {
+        "items": [
+            {
+                "id": r.id,
+                "title": r.title or "Untitled Task",
+                "is_completed": bool(r.is_completed),
+                "steps_total": r.steps_total or 0,
+                "steps_completed": r.steps_completed or 0,
+            }
+            for r in rows
+        ],
+        "next_cursor": next_cursor,
+    }
+    return JSONResponse(body, headers=headers)
+
 @router.get("/{task_id}")
 async def get_task_details(task_id: int, db: AsyncSession = Depends(get_db)):
     """
@@ -128,18 +336,23 @@ async def get_task_details(task_id: int, db: AsyncSession = Depends(get_db)):
         select(MicroWinModel).where(MicroWinModel.task_id == task_id).order_by(MicroWinModel.step_order)
     )
     steps = result.scalars().all()
+    (goal,) = await plaintext_cache.decrypt("tasks", [(task.id, task.encrypted_goal)])
+    actions = await plaintext_cache.decrypt("micro_wins", [(s.id, s.encrypted_action) for s in steps])
 
     return {
         "id": task.id,
         "title": task.title,
-        "goal": decrypt_data(task.encrypted_goal.encode('utf-8')),
+        "goal": goal,
+        "is_completed": task.is_completed,
+        "steps_total": task.steps_total or 0,
+        "steps_completed": task.steps_completed or 0,
         "steps": [
             {
                 "id": s.id,
-                "action": decrypt_data(s.encrypted_action), # Decrypt for UI
+                "action": action, # Decrypted for UI
                 "is_completed": s.is_completed,
                 "order": s.step_order
-            } for s in steps
+            } for s, action in zip(steps, actions)
         ]
     }
 
@@ -150,73 +363,208 @@ async def delete_task(task_id: int, db: AsyncSession = Depends(get_db)):
     task = await db.get(Task, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
+    step_ids = (await db.execute(select(MicroWinModel.id).where(MicroWinModel.task_id == task_id))).scalars().all()
+    owner_id = task.user_id
     await db.delete(task)
     await db.commit()
+    sidebar_versions.bump(owner_id)
+    plaintext_cache.invalidate("tasks", task_id)
+    plaintext_cache.invalidate("micro_wins", *step_ids)
     return None
 
+# ─── Step Completion (set-based) ──────────────────────────────
+async def _set_steps_completed(db: AsyncSession, updates: Dict[int, bool], owner_id: Optional[int] = None):
+    """
+    Apply {step_id: is_completed} in a few set-based statements and
+    adjust the parent tasks' steps_completed counters.  A task is
+    completed when steps_completed reaches steps_total, so the decision
+    never reads its steps.  Gamification counters are bumped in SQL,
+    once per task that flips from not-completed to completed, so
+    concurrent taps can neither double-count nor lose an increment.
+    Only a task's first completion is credited (tasks.completion_credited),
+    so toggling a finished task's step off and on again earns nothing.
+    Today's daily_completions rows are updated in the same transaction.
+
+    With ``owner_id`` only steps of that user's tasks are touched; the
+    rest are left alone and reported as not found.
+
+    Returns (step_id -> task_id for the steps found,
+             task_id -> is_completed,
+             user_id -> (streak_count, total_completed) for users credited,
+             owners of every task touched).
+    """
+    # 1. Resolve the parent tasks
+    rows = await db.execute(
+        select(MicroWinModel.id, MicroWinModel.task_id).where(MicroWinModel.id.in_(list(updates)))
+    )
+    step_tasks: Dict[int, int] = {row.id: row.task_id for row in rows}
+    task_ids = sorted({tid for tid in step_tasks.values() if tid is not None})
+
+    # 2. Lock them before touching any step, always in id order, so
+    #    concurrent batches (and single toggles) cannot deadlock
+    task_state: Dict[int, bool] = {}
+    credited_before: set = set()
+    task_users: Dict[int, int] = {}
+    if task_ids:
+        query = select(Task.id, Task.user_id, Task.is_completed, Task.completion_credited).where(Task.id.in_(task_ids))
+        if owner_id is not None:
+            query = query.where(Task.user_id == owner_id)
+        locked = (await db.execute(query.order_by(Task.id).with_for_update())).all()
+        task_state = {row.id: bool(row.is_completed) for row in locked}
+        credited_before = {row.id for row in locked if row.completion_credited}
+        task_users = {row.id: row.user_id for row in locked if row.user_id is not None}
+    if owner_id is not None:
+        step_tasks = {step_id: tid for step_id, tid in step_tasks.items() if tid in task_state}
+    owners = set(task_users.values())
+    task_owner = {}
+
+    # 3. One UPDATE ... RETURNING per target value; only steps that actually change come back
+    deltas: Dict[int, int] = {}
+    for value in (True, False):
+        ids = [step_id for step_id in step_tasks if updates[step_id] is value]
+        if ids:
+            changes = MicroWinModel.is_completed.is_not(True) if value else MicroWinModel.is_completed.is_(True)
+            rows = await db.execute(
+                update(MicroWinModel)
+                .where(MicroWinModel.id.in_(ids), changes)
+                .values(is_completed=value)
+                .returning(MicroWinModel.id, MicroWinModel.task_id)
+                .execution_options(synchronize_session=False)
+            )
+            for row in rows:
+                if row.task_id is not None:
+                    deltas[row.task_id] = deltas.get(row.task_id, 0) + (1 if value else -1)
+    if not task_state:
+        return step_tasks, {}, {}, set()
+
+    # 4. Apply the deltas, one UPDATE per distinct delta; O(1) per task
+    by_delta: Dict[int, list] = {}
+    for task_id, delta in deltas.items():
+        if delta and task_id in task_state:
+            by_delta.setdefault(delta, []).append(task_id)
+    for delta, ids in by_delta.items():
+        done = and_(Task.steps_total > 0, Task.steps_completed + delta >= Task.steps_total)
+        rows = await db.execute(
+            update(Task)
+            .where(Task.id.in_(ids))
+            .values(
+                steps_completed=Task.steps_completed + delta,
+                is_completed=done,
+                completion_credited=or_(Task.completion_credited, done),
+            )
+            .returning(Task.id, Task.user_id, Task.is_completed)
+            .execution_options(synchronize_session=False)
+        )
+        for row in rows:
+            if row.is_completed and not task_state[row.id] and row.id not in credited_before and row.user_id:
+                task_owner[row.id] = row.user_id
+            task_state[row.id] = bool(row.is_completed)
+
+    # 5. Gamification: atomic, SQL-side increments per credited user
+    credited: Dict[int, int] = {}
+    for user_id in task_owner.values():
+        credited[user_id] = credited.get(user_id, 0) + 1
+    today = date.today()
+    gamification = {}
+    for user_id, quests in credited.items():
+        row = (await db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(
+                total_completed=func.coalesce(User.total_completed, 0) + quests,
+                # Streak logic: same day keeps it, consecutive day extends it, otherwise restart at 1
+                streak_count=case(
+                    (User.last_completion_date == today, User.streak_count),
+                    (User.last_completion_date == today - timedelta(days=1), func.coalesce(User.streak_count, 0) + 1),
+                    else_=1,
+                ),
+                last_completion_date=today,
+            )
+            .returning(User.streak_count, User.total_completed)
+            .execution_options(synchronize_session=False)
+        )).one_or_none()
+        if row is not None:
+            gamification[user_id] = (row.streak_count or 0, row.total_completed or 0)
+
+    # 6. Today's rollup row per user (stats history, weekly activity)
+    daily: Dict[int, Tuple[int, int]] = {}
+    for task_id, delta in deltas.items():
+        if task_id in task_users:
+            tasks_done, steps_done = daily.get(task_users[task_id], (0, 0))
+            daily[task_users[task_id]] = (tasks_done, steps_done + delta)
+    for user_id, quests in credited.items():
+        tasks_done, steps_done = daily.get(user_id, (0, 0))
+        daily[user_id] = (tasks_done + quests, steps_done)
+    await record_daily(db, today, daily)
+
+    return step_tasks, task_state, gamification, owners
+
+def _after_completion_commit(gamification: dict, owners: set) -> None:
+    for user_id in gamification:
+        # Streak and total_completed changed
+        principal_cache.bump(user_id)
+    # Sidebar progress counts changed
+    sidebar_versions.bump(*owners)
+
 @router.patch("/microwins/{step_id}", status_code=200)
-async def update_microwin_status(step_id: int, is_completed: bool, db: AsyncSession = Depends(get_db)):
+async def update_microwin_status(
+    step_id: int,
+    is_completed: bool,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
     """
-    Update the completion status of a specific micro-win step.
+    Update the completion status of one of the current user's micro-win steps.
     Also updates the parent Task's is_completed status if all steps are finished.
     Includes streak/gamification logic.
     """
-    # 1. Fetch the step
-    step = await db.get(MicroWinModel, step_id)
-    if not step:
+    step_tasks, task_state, gamification, owners = await _set_steps_completed(
+        db, {step_id: is_completed}, owner_id=current_user.id
+    )
+    if step_id not in step_tasks:
         raise HTTPException(status_code=404, detail="Micro-win step not found")
-    
-    # 2. Update status
-    step.is_completed = is_completed
+    await db.commit()
+    _after_completion_commit(gamification, owners)
 
-    # 3. Check if ALL steps for this task are now completed
-    result = await db.execute(
-        select(MicroWinModel).where(MicroWinModel.task_id == step.task_id)
+    task_id = step_tasks[step_id]
+    streak_count, total_completed = gamification.get(
+        current_user.id, (current_user.streak_count or 0, current_user.total_completed or 0)
     )
-    all_steps = result.scalars().all()
-
-    all_done = all(s.is_completed for s in all_steps)
-
-    # 4. Update Parent Task
-    parent_task = await db.get(Task, step.task_id)
-    if parent_task:
-        parent_task.is_completed = all_done
-
-    # 5. Gamification: Update streak when a full quest is completed
-    streak_count = 0
-    total_completed = 0
-    if all_done and parent_task and parent_task.user_id:
-        user = await db.get(User, parent_task.user_id)
-        if user:
-            today = date.today()
-            user.total_completed = (user.total_completed or 0) + 1
-            total_completed = user.total_completed
-
-            # Streak logic: consecutive days
-            if user.last_completion_date:
-                days_diff = (today - user.last_completion_date).days
-                if days_diff == 0:
-                    # Same day — keep streak
-                    pass
-                elif days_diff == 1:
-                    # Consecutive day — increment streak
-                    user.streak_count = (user.streak_count or 0) + 1
-                else:
-                    # Streak broken — reset to 1
-                    user.streak_count = 1
-            else:
-                # First ever completion
-                user.streak_count = 1
-            
-            user.last_completion_date = today
-            streak_count = user.streak_count
+    return {
+        "id": step_id,
+        "is_completed": is_completed,
+        "task_completed": task_state.get(task_id, False),
+        "streak_count": streak_count,
+        "total_completed": total_completed,
+    }
 
+@router.patch("/microwins", status_code=200)
+async def update_microwins_bulk(
+    body: MicroWinBulkUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Toggle several of the current user's steps in one request (and one transaction).
+    Unknown step ids, and steps of other users' tasks, are reported in
+    "missing" instead of failing the batch.
+    """
+    updates = {item.step_id: item.is_completed for item in body.updates}
+    step_tasks, task_state, gamification, owners = await _set_steps_completed(db, updates, owner_id=current_user.id)
     await db.commit()
-    
+    _after_completion_commit(gamification, owners)
+
+    # Only the caller's own counters; unchanged unless this batch completed a task
+    streak_count, total_completed = gamification.get(
+        current_user.id, (current_user.streak_count or 0, current_user.total_completed or 0)
+    )
     return {
-        "id": step.id, 
-        "is_completed": step.is_completed,
-        "task_completed": parent_task.is_completed if parent_task else False,
+        "steps": [
+            {"id": step_id, "is_completed": updates[step_id], "task_id": task_id}
+            for step_id, task_id in step_tasks.items()
+        ],
+        "missing": [step_id for step_id in updates if step_id not in step_tasks],
+        "tasks": [{"id": task_id, "is_completed": done} for task_id, done in task_state.items()],
         "streak_count": streak_count,
         "total_completed": total_completed,
-    }
\ No newline at end of file
+    }
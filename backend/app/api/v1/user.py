@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.db.session import get_db
 from app.models.user import User
-from app.schemas.user import UserCreate, UserProfileUpdate, UserRead
-from app.core.security import encrypt_data, decrypt_data, hash_password, verify_password
+from app.schemas.user import UserCreate, UserProfileUpdate, UserRead, UserStats, LeaderboardRead
+from app.core.config import settings
+from app.core.security import encrypt_data, get_current_user
+from app.core.principal_cache import Principal, principal_cache
+from app.services.password_hasher import password_hasher
+from app.services.plaintext_cache import plaintext_cache
+from app.services.user_stats import current_streak, daily_history, leaderboard
 
 router = APIRouter()
 
@@ -23,7 +29,7 @@ async def signup(user_in: UserCreate, db: AsyncSession = Depends(get_db)):
     # Use hash_password for the 'hashed_password' column
     new_user = User(
         email=user_in.email,
-        hashed_password=hash_password(user_in.password),
+        hashed_password=await password_hasher.hash(user_in.password),
         granularity_level=3 # Default middle-ground
     )
     
@@ -46,17 +52,20 @@ async def login(user_credentials: UserCreate, db: AsyncSession = Depends(get_db)
         )
 
     # 2. Verify Password (using the logic from app/core/security.py)
-    if not verify_password(user_credentials.password, user.hashed_password):
+    if not user.hashed_password or not await password_hasher.verify(user_credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
 
+    preferences, struggle_areas = await plaintext_cache.decrypt(
+        "users", [(user.id, user.encrypted_preferences), (user.id, user.encrypted_struggle_areas)]
+    )
     return {
             "id": user.id,
             "email": user.email,
-            "preferences": decrypt_data(user.encrypted_preferences) if user.encrypted_preferences else None,
-            "struggle_areas": decrypt_data(user.encrypted_struggle_areas) if user.encrypted_struggle_areas else None,
+            "preferences": preferences,
+            "struggle_areas": struggle_areas,
             "granularity_level": user.granularity_level
         }
 
@@ -85,10 +94,57 @@ async def update_neuro_profile(
         user.full_name = profile_in.full_name
 
     await db.commit()
+    plaintext_cache.invalidate("users", user_id)
+    principal_cache.bump(user_id)
     await db.refresh(user)
     return user
 
-# --- 3. FETCH USER DATA (Loading Dashboard) ---
+# --- 3. GAMIFICATION STATS ---
+# Declared before /{user_id} so "leaderboard" is not parsed as a user id
+@router.get("/leaderboard", response_model=LeaderboardRead)
+async def get_leaderboard(
+    limit: int = Query(10, ge=1, le=settings.LEADERBOARD_TOP_N),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Top users by completed tasks, anonymised, from the cached snapshot (no query on a warm cache)."""
+    return await leaderboard.top(limit, viewer_id=current_user.id)
+
+@router.get("/{user_id}/stats", response_model=UserStats)
+async def get_user_stats(
+    user_id: int,
+    days: int = Query(7, ge=1, le=settings.STATS_HISTORY_MAX_DAYS),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    The caller's streak, totals, daily history and leaderboard position.
+    One primary-key read of the user, one range read of the rollup; never touches micro_wins.
+    """
+    # Same answer as a missing user, like tasks: other users' ids are not probed
+    if user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="User not found")
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    today = date.today()
+    history = await daily_history(db, user_id, max(days, 7), today)
+    week = history[-7:]
+    position = await leaderboard.position(user.total_completed)
+    return {
+        "user_id": user.id,
+        "streak_count": current_streak(user.streak_count, user.last_completion_date, today),
+        "total_completed": user.total_completed or 0,
+        "last_completion_date": user.last_completion_date.isoformat() if user.last_completion_date else None,
+        "week_tasks_completed": sum(d["tasks_completed"] for d in week),
+        "week_steps_completed": sum(d["steps_completed"] for d in week),
+        "rank": position["rank"],
+        "percentile": position["percentile"],
+        "total_users": position["total_users"],
+        "history": history[-days:],
+    }
+
+# --- 4. FETCH USER DATA (Loading Dashboard) ---
 @router.get("/{user_id}", response_model=UserRead)
 async def get_user_dashboard_data(user_id: int, db: AsyncSession = Depends(get_db)):
     user = await db.get(User, user_id)
@@ -96,12 +152,14 @@ async def get_user_dashboard_data(user_id: int, db: AsyncSession = Depends(get_d
         raise HTTPException(status_code=404, detail="User not found")
 
     # Decrypt the personal struggles so the UI can show them
+    preferences, struggle_areas = await plaintext_cache.decrypt(
+        "users", [(user.id, user.encrypted_preferences), (user.id, user.encrypted_struggle_areas)]
+    )
     return {
         "id": user.id,
         "email": user.email,
-        # We .encode() the string back into bytes for the decrypt_data function
-        "preferences": decrypt_data(user.encrypted_preferences.encode('utf-8')) if user.encrypted_preferences else None,
-        "struggle_areas": decrypt_data(user.encrypted_struggle_areas.encode('utf-8')) if user.encrypted_struggle_areas else None,
+        "preferences": preferences,
+        "struggle_areas": struggle_areas,
         "granularity_level": user.granularity_level
     }
 
@@ -1,22 +1,114 @@
 import os
+from typing import List
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 ENV_PATH = os.path.join(BASE_DIR, ".env")
 
 class Settings(BaseSettings):
-    GEMINI_API_KEY: str
+    GEMINI_API_KEY: str = ""  # Not needed when LLM_PROVIDER="fake"
     DATABASE_URL: str
     DB_ENCRYPTION_KEY: str
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
 
     # JWT
     JWT_SECRET_KEY: str = "microwin-super-secret-key-change-in-production-2024"
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRATION_MINUTES: int = 1440  # 24 hours
 
+    # Authenticated-principal cache (verified claims + user snapshot)
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+
+    # Password hashing pool (bcrypt), separate from the default executor
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_MAX: int = 32     # Running + waiting; beyond this logins get a 503
+    PASSWORD_HASH_USE_PROCESSES: bool = False
+
     # OAuth2 — Google
     GOOGLE_CLIENT_ID: str = ""
+    GOOGLE_USERINFO_URL: str = "https://www.googleapis.com/oauth2/v2/userinfo"
+    GOOGLE_USERINFO_CACHE_TTL_SECONDS: int = 60  # 0 disables the verified-token cache
+    GOOGLE_USERINFO_CACHE_MAX_ENTRIES: int = 4096
+
+    # Shared outbound HTTP client
+    HTTP_CLIENT_HTTP2: bool = True  # Used when the optional "h2" package is installed
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 20
+    HTTP_CLIENT_KEEPALIVE_SECONDS: float = 60.0
+    HTTP_CLIENT_TIMEOUT_SECONDS: float = 10.0
+
+    # Decomposition cache ("memory", "local_kv" or "none")
+    DECOMPOSE_CACHE_BACKEND: str = "memory"
+    DECOMPOSE_CACHE_TTL_SECONDS: int = 3600
+    DECOMPOSE_CACHE_MAX_ENTRIES: int = 2048
+
+    # Admission control in front of the LLM
+    LLM_MAX_CONCURRENT_STREAMS: int = 8
+    LLM_QUEUE_MAX: int = 32
+    LLM_QUEUE_TIMEOUT_SECONDS: float = 15.0
+    USER_RATE_BURST: int = 5           # Decompositions a user may fire back-to-back
+    USER_RATE_PER_MINUTE: float = 6.0  # Steady-state refill
+    ADMISSION_CLAIM_TTL_SECONDS: float = 30.0  # Capacity held for a response that is never read
+
+    # LLM provider ("gemini" or "fake" for offline load testing)
+    LLM_PROVIDER: str = "gemini"
+    FAKE_LLM_CHUNK_SIZES: List[int] = [16, 5, 32]  # Cycled to cut the output
+    FAKE_LLM_TTFT_MS: int = 300
+    FAKE_LLM_CHUNK_DELAY_MS: int = 20
+    FAKE_LLM_STEPS: int = 5
+    FAKE_LLM_ERROR_RATE: float = 0.0       # Share of calls failing with a transient 503
+    FAKE_LLM_RATE_LIMIT_RATE: float = 0.0  # Share of calls failing with a 429
+    FAKE_LLM_SEED: int = 0
+
+    # PII scrubbing (spaCy micro-batching)
+    PII_BATCH_MAX_SIZE: int = 32
+    PII_BATCH_MAX_WAIT_MS: int = 5
+    PII_PROCESS_WORKERS: int = 0  # 0 = one dedicated thread, -1 = one process per core
+    # spaCy NER labels plus the regex-detected EMAIL, PHONE and URL
+    PII_LABELS: List[str] = ["PERSON", "GPE", "ORG", "EMAIL", "PHONE", "URL"]
+
+    # Upstream resilience (deadlines, hedging, retries, circuit breaker)
+    LLM_TTFT_DEADLINE_SECONDS: float = 8.0
+    LLM_HEDGE_AFTER_SECONDS: float = 2.5  # 0 disables hedging
+    LLM_STREAM_IDLE_TIMEOUT_SECONDS: float = 10.0
+    LLM_MAX_RETRIES: int = 2
+    LLM_RETRY_BASE_SECONDS: float = 0.25
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5
+    LLM_BREAKER_RESET_SECONDS: float = 30.0
+
+    # Write-behind buffer for streamed micro-wins
+    STEP_WRITE_MAX_PENDING: int = 16         # Flush early once this many steps are buffered
+    STEP_WRITE_MAX_DELAY_SECONDS: float = 2.0  # ...or once the oldest buffered write is this old
+
+    # Task listing (keyset pagination)
+    TASK_PAGE_SIZE_DEFAULT: int = 20
+    TASK_PAGE_SIZE_MAX: int = 100
+    TASK_EXPORT_BATCH_SIZE: int = 500  # Rows fetched per round trip by the streaming export
+
+    # Task progress counters (tasks.steps_total / steps_completed)
+    PROGRESS_RECONCILE_INTERVAL_SECONDS: int = 0  # Background drift repair; 0 = only via reconcile_progress.py
+    PROGRESS_RECONCILE_BATCH_SIZE: int = 1000     # Tasks checked per transaction
+
+    # Gamification stats
+    LEADERBOARD_TOP_N: int = 100                # Entries kept in the cached leaderboard
+    LEADERBOARD_CACHE_TTL_SECONDS: int = 60     # Ranks/percentiles are at most this stale
+    LEADERBOARD_RANKED_USERS: int = 10000       # Exact ranks for this many top users; the rest share the bottom rank
+    LEADERBOARD_HANDLE_KEY: str = "microwin-leaderboard-handle-key-change-in-production"  # Keys the anonymous handles
+    STATS_HISTORY_MAX_DAYS: int = 365
+
+    # Built frontend (backend/static in the Docker image)
+    STATIC_COMPRESS_MIN_BYTES: int = 1024              # Smaller files are sent as-is
+    STATIC_MAX_CACHED_FILE_BYTES: int = 5 * 1024 * 1024  # Larger files are streamed from disk, uncompressed
+    STATIC_MAX_AGE_SECONDS: int = 3600                 # Unhashed files (favicon, public/assets copies)
+
+    # Bulk Fernet work (decrypt_many / encrypt_many)
+    CRYPTO_INLINE_MAX: int = 64     # Batches up to this size run inline on the event loop
+    CRYPTO_POOL_WORKERS: int = 4
 
+    # Decrypted-field cache for hot records (memory only, never persisted)
+    PLAINTEXT_CACHE_MAX_ENTRIES: int = 10000
+    PLAINTEXT_CACHE_TTL_SECONDS: int = 300
 
     # Frontend
     FRONTEND_URL: str = "http://localhost:5173"
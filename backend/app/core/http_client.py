@@ -0,0 +1,42 @@
+# Shared outbound HTTP client (one connection pool for the whole app)
+import importlib.util
+from typing import Optional
+
+import httpx
+
+from app.core.config import settings
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_available() -> bool:
+    # HTTP/2 needs the optional "h2" package (pip install httpx[http2])
+    return importlib.util.find_spec("h2") is not None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    The app-lifetime client: keep-alive connections (and HTTP/2 when
+    available) are reused across requests instead of paying a fresh
+    TCP+TLS handshake each time.  Created in the lifespan; built lazily
+    here for scripts that run without it.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=settings.HTTP_CLIENT_HTTP2 and _http2_available(),
+            timeout=httpx.Timeout(settings.HTTP_CLIENT_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_SECONDS,
+            ),
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,134 @@
+"""
+Short-lived cache of authenticated principals for get_current_user.
+
+Two layers, both in process memory:
+  - verified JWT claims per token, so a token's signature is checked
+    once and not on every request (still honouring its "exp");
+  - a read-only snapshot of the user row per user id, tagged with the
+    user's version counter.
+
+Writers call bump(user_id) after changing profile or gamification
+fields; every cached snapshot with an older version then misses.
+Counters are per worker process, so PRINCIPAL_CACHE_TTL_SECONDS bounds
+how stale another worker's snapshot can be.
+"""
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.ttl_cache import TTLCache
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user as seen by request handlers (detached from any session)."""
+
+    id: int
+    email: str
+    full_name: Optional[str]
+    auth_provider: Optional[str]
+    encrypted_preferences: Optional[str]
+    encrypted_struggle_areas: Optional[str]
+    granularity_level: Optional[int]
+    streak_count: Optional[int]
+    total_completed: Optional[int]
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            auth_provider=user.auth_provider,
+            encrypted_preferences=user.encrypted_preferences,
+            encrypted_struggle_areas=user.encrypted_struggle_areas,
+            granularity_level=user.granularity_level,
+            streak_count=user.streak_count,
+            total_completed=user.total_completed,
+        )
+
+
+class PrincipalCache:
+    def __init__(self, ttl: float, max_entries: int) -> None:
+        self._ttl = ttl
+        # Claims expire on wall-clock time (they carry "exp"), principals on monotonic time
+        self._claims: TTLCache[dict] = TTLCache(max_entries, ttl, clock=time.time)
+        self._principals: TTLCache[tuple] = TTLCache(max_entries, ttl)
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.claims_hits = 0
+        self.claims_misses = 0
+        self.principal_hits = 0
+        self.principal_misses = 0
+        self.bumps = 0
+
+    @staticmethod
+    def _token_key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    # ─── JWT claims ───────────────────────────────────────────
+    def get_claims(self, token: str) -> Optional[dict]:
+        with self._lock:
+            claims = self._claims.get(self._token_key(token))
+            if claims is None:
+                self.claims_misses += 1
+            else:
+                self.claims_hits += 1
+            return claims
+
+    def set_claims(self, token: str, claims: dict) -> None:
+        # Never outlive the token itself
+        expires_at = time.time() + self._ttl
+        if isinstance(claims.get("exp"), (int, float)):
+            expires_at = min(expires_at, claims["exp"])
+        with self._lock:
+            self._claims.set(self._token_key(token), claims, expires_at=expires_at)
+
+    # ─── Principals ───────────────────────────────────────────
+    def get_principal(self, user_id: int) -> Optional[Principal]:
+        with self._lock:
+            item = self._principals.get(user_id)
+            if item is not None and item[0] == self._versions.get(user_id, 0):
+                self.principal_hits += 1
+                return item[1]
+            self.principal_misses += 1
+            return None
+
+    def version(self, user_id: int) -> int:
+        """Read before loading the row; pass to set_principal."""
+        with self._lock:
+            return self._versions.get(user_id, 0)
+
+    def set_principal(self, principal: Principal, version: int) -> None:
+        with self._lock:
+            # A bump raced with the load: the row we read may already be stale
+            if version != self._versions.get(principal.id, 0):
+                return
+            self._principals.set(principal.id, (version, principal))
+
+    def bump(self, user_id: int) -> None:
+        """Invalidate the cached principal after the user's row changed."""
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            self._principals.pop(user_id)
+            self.bumps += 1
+
+    def stats(self) -> dict:
+        return {
+            "claims_entries": len(self._claims),
+            "claims_hits": self.claims_hits,
+            "claims_misses": self.claims_misses,
+            "principal_entries": len(self._principals),
+            "principal_hits": self.principal_hits,
+            "principal_misses": self.principal_misses,
+            "bumps": self.bumps,
+        }
+
+
+principal_cache = PrincipalCache(
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+)
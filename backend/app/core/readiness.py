@@ -0,0 +1,43 @@
+# Startup readiness tracking (separate from liveness)
+import time
+from typing import Dict, Optional
+
+
+class Readiness:
+    """
+    Tracks named warm-up phases started in the lifespan.
+    The app is ready once every registered phase has finished.
+    """
+
+    def __init__(self) -> None:
+        self._started: Dict[str, float] = {}
+        self._finished: Dict[str, float] = {}
+        self._errors: Dict[str, str] = {}
+
+    def start(self, phase: str) -> None:
+        self._started[phase] = time.perf_counter()
+
+    def finish(self, phase: str, error: Optional[BaseException] = None) -> None:
+        self._finished[phase] = time.perf_counter() - self._started.get(phase, time.perf_counter())
+        if error is not None:
+            self._errors[phase] = str(error)
+
+    @property
+    def ready(self) -> bool:
+        return all(phase in self._finished and phase not in self._errors for phase in self._started)
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "phases": {
+                phase: {
+                    "done": phase in self._finished,
+                    "seconds": round(self._finished[phase], 3) if phase in self._finished else None,
+                    "error": self._errors.get(phase),
+                }
+                for phase in self._started
+            },
+        }
+
+
+readiness = Readiness()
@@ -0,0 +1,245 @@
+"""
+Serving the built frontend (STATIC_DIR) from an in-memory manifest.
+
+load() walks STATIC_DIR once at startup and keeps, per file, its bytes,
+content type, an ETag and precompressed variants: any .br/.gz the
+build already emitted, otherwise gzip (and brotli, when the optional
+"brotli" package is installed) compressed here.  Requests are then a
+dict lookup plus Accept-Encoding negotiation, never a filesystem call.
+Each encoding is its own representation with its own strong ETag
+("<hash>-br", "<hash>-gzip").
+
+Audio, video and files over STATIC_MAX_CACHED_FILE_BYTES stay on disk
+and go through FileResponse, which answers Range requests (206) so
+media can seek and play in Safari.
+
+Caching:
+  hashed files   listed in Vite's build manifest (.vite/manifest.json,
+                 build.manifest in vite.config.ts): a year, immutable
+  index.html     and the SPA fallback: always revalidated (ETag / 304)
+  anything else  (public/ copies such as assets/icon.svg, which keep
+                 their name across builds) revalidated after
+                 STATIC_MAX_AGE_SECONDS
+
+Only paths found in the manifest are ever served, so "..", absolute
+paths or symlinks pointing outside STATIC_DIR cannot reach other files.
+"""
+import gzip
+import hashlib
+import importlib.util
+import json
+import mimetypes
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+
+from app.core.config import settings
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+INDEX = "index.html"
+VITE_MANIFEST = os.path.join(".vite", "manifest.json")
+
+# Served from disk so Range requests work
+_STREAMED = ("audio/", "video/")
+# Worth compressing; images and fonts are already compressed
+_COMPRESSIBLE = ("text/", "application/javascript", "application/json", "image/svg+xml", "application/xml",
+                 "application/manifest+json", "application/wasm")
+_PRECOMPRESSED = {".br": "br", ".gz": "gzip"}
+
+
+def _brotli():
+    # Optional: pip install brotli
+    if importlib.util.find_spec("brotli") is None:
+        return None
+    import brotli
+    return brotli
+
+
+@dataclass
+class _Asset:
+    path: str
+    content_type: str
+    etag: str                              # Identity representation; variants append "-<encoding>"
+    size: int
+    body: Optional[bytes]                  # None: too big to keep, streamed from disk
+    variants: Dict[str, bytes] = field(default_factory=dict)  # encoding -> bytes
+
+
+def _content_type(path: str) -> str:
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if content_type.startswith("text/") or content_type in ("application/javascript", "application/json"):
+        content_type += "; charset=utf-8"
+    return content_type
+
+
+def _hashed_files(root: str) -> Set[str]:
+    """Output files Vite named with a content hash, from its build manifest (empty if there is none)."""
+    try:
+        with open(os.path.join(root, VITE_MANIFEST), encoding="utf-8") as f:
+            chunks = json.load(f)
+    except (OSError, ValueError):
+        return set()
+    hashed = set()
+    for chunk in chunks.values():
+        hashed.add(chunk["file"])
+        hashed.update(chunk.get("css", []))
+        hashed.update(chunk.get("assets", []))
+    return hashed
+
+
+def _accepted(header: Optional[str]) -> List[str]:
+    """Encodings the client accepts (q > 0), in our order of preference."""
+    if not header:
+        return []
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    wildcard = accepted.get("*", 0.0)
+    return [enc for enc in ("br", "gzip") if accepted.get(enc, wildcard) > 0]
+
+
+class StaticAssets:
+    def __init__(self, root: str) -> None:
+        self.root = os.path.realpath(root)
+        self._manifest: Dict[str, _Asset] = {}
+        self._hashed: Set[str] = set()
+        self.not_modified = 0
+        self.served: Dict[str, int] = {"br": 0, "gzip": 0, "identity": 0}
+        self.load_seconds = 0.0
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self._manifest)
+
+    # ─── Manifest ─────────────────────────────────────────────
+    def load(self) -> None:
+        """Build the manifest; blocking, run it off the event loop."""
+        t0 = time.perf_counter()
+        brotli = _brotli()
+        manifest: Dict[str, _Asset] = {}
+        precompressed: List[Tuple[str, str, str]] = []
+
+        for dirpath, dirnames, filenames in os.walk(self.root, followlinks=False):
+            # Build metadata (.vite/) is not served
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for filename in filenames:
+                full = os.path.realpath(os.path.join(dirpath, filename))
+                if os.path.commonpath([full, self.root]) != self.root or not os.path.isfile(full):
+                    continue
+                rel = os.path.relpath(os.path.join(dirpath, filename), self.root).replace(os.sep, "/")
+                base, ext = os.path.splitext(rel)
+                if ext in _PRECOMPRESSED:
+                    precompressed.append((base, _PRECOMPRESSED[ext], full))
+                    continue
+                manifest[rel] = self._build(full, brotli)
+
+        # Variants the frontend build emitted itself win over ours
+        for rel, encoding, full in precompressed:
+            asset = manifest.get(rel)
+            if asset is not None and asset.body is not None:
+                with open(full, "rb") as f:
+                    asset.variants[encoding] = f.read()
+
+        self._manifest = manifest
+        self._hashed = _hashed_files(self.root) & manifest.keys()
+        self.load_seconds = round(time.perf_counter() - t0, 3)
+        print(f"Static assets: {len(manifest)} file(s) loaded in {self.load_seconds}s (brotli {'on' if brotli else 'off'})")
+
+    def _build(self, full: str, brotli) -> _Asset:
+        size = os.path.getsize(full)
+        content_type = _content_type(full)
+        if size > settings.STATIC_MAX_CACHED_FILE_BYTES or content_type.startswith(_STREAMED):
+            stat = os.stat(full)
+            etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+            return _Asset(full, content_type, etag, size, body=None)
+
+        with open(full, "rb") as f:
+            body = f.read()
+        asset = _Asset(full, content_type, f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"', size, body)
+        if size >= settings.STATIC_COMPRESS_MIN_BYTES and content_type.startswith(_COMPRESSIBLE):
+            gz = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(gz) < size:
+                asset.variants["gzip"] = gz
+            if brotli is not None:
+                br = brotli.compress(body, quality=11)
+                if len(br) < size:
+                    asset.variants["br"] = br
+        return asset
+
+    # ─── Responses ────────────────────────────────────────────
+    def lookup(self, path: str) -> Optional[_Asset]:
+        # Manifest keys are normalised relative paths; anything else is simply not found
+        if "\\" in path or "\x00" in path or any(seg in ("..", ".") for seg in path.split("/")):
+            return None
+        return self._manifest.get(path.lstrip("/"))
+
+    def response(self, path: str, request: Request, cache_control: str) -> Response:
+        asset = self.lookup(path)
+        if asset is None:
+            return Response(status_code=404)
+        # Pick the representation first: the ETag (and so the 304 check) depends on it
+        encoding = None
+        if asset.body is not None:
+            encoding = next((e for e in _accepted(request.headers.get("accept-encoding")) if e in asset.variants), None)
+        etag = asset.etag if encoding is None else f'{asset.etag[:-1]}-{encoding}"'
+        headers = {"ETag": etag, "Cache-Control": cache_control}
+        if asset.variants:
+            headers["Vary"] = "Accept-Encoding"
+
+        inm = request.headers.get("if-none-match")
+        if inm and (inm.strip() == "*" or etag in (tag.strip().removeprefix("W/") for tag in inm.split(","))):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        self.served[encoding or "identity"] += 1
+        if asset.body is None:
+            # Handles Range / If-Range itself
+            return FileResponse(asset.path, media_type=asset.content_type, headers=headers)
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+            return Response(asset.variants[encoding], media_type=asset.content_type, headers=headers)
+        return Response(asset.body, media_type=asset.content_type, headers=headers)
+
+    def _cache_control(self, path: str) -> str:
+        if path in self._hashed:
+            return IMMUTABLE
+        return f"public, max-age={settings.STATIC_MAX_AGE_SECONDS}, must-revalidate"
+
+    def serve_asset(self, rest_of_path: str, request: Request) -> Response:
+        """/assets/*: immutable if content-hashed, otherwise revalidated."""
+        path = f"assets/{rest_of_path}"
+        return self.response(path, request, self._cache_control(path))
+
+    def serve_spa(self, full_path: str, request: Request) -> Response:
+        """Root-level files as themselves, every other path gets index.html (client-side routing)."""
+        if full_path and full_path != INDEX and self.lookup(full_path) is not None:
+            return self.response(full_path, request, self._cache_control(full_path))
+        return self.response(INDEX, request, REVALIDATE)
+
+    def stats(self) -> dict:
+        return {
+            "files": len(self._manifest),
+            "immutable": len(self._hashed),
+            "bytes": sum(a.size for a in self._manifest.values()),
+            "load_seconds": self.load_seconds,
+            "served": dict(self.served),
+            "not_modified": self.not_modified,
+        }
+
+
+# backend/static: the built frontend is copied here in the Docker image
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "static")
+static_assets = StaticAssets(STATIC_DIR)
@@ -0,0 +1,63 @@
+"""
+Bounded LRU map with per-entry expiry, shared by the in-process caches
+(decomposition cache, principal cache, plaintext cache, Google userinfo).
+
+Not thread-safe on its own: every user already holds a lock around
+compound operations (check-then-set, version checks, secondary
+indexes), so one more lock in here would only be taken twice.
+"""
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        on_evict: Optional[Callable[[Hashable], None]] = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self._ttl = ttl
+        self._clock = clock
+        # Called for every key that leaves the map other than through pop()/clear()
+        self._on_evict = on_evict
+        self._entries: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[V]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= self._clock():
+            self._evict(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: V, ttl: Optional[float] = None, expires_at: Optional[float] = None) -> None:
+        """Store ``value`` until ``expires_at`` (on this cache's clock), else for ``ttl`` or the default TTL."""
+        if expires_at is None:
+            expires_at = self._clock() + (self._ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._evict(next(iter(self._entries)))
+
+    def pop(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _evict(self, key: Hashable) -> None:
+        del self._entries[key]
+        if self._on_evict is not None:
+            self._on_evict(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,145 @@
+"""
+Versioned schema migrations.
+
+Each module here named vNNNN_<name>.py is one migration with:
+  VERSION:       int, strictly increasing
+  DESCRIPTION:   one line for schema_migrations
+  TRANSACTIONAL: False for steps that cannot run inside a transaction
+                 (CREATE INDEX CONCURRENTLY); those must be idempotent
+  upgrade(conn): async, receives an AsyncConnection
+
+Applied versions are recorded in the schema_migrations table.  Run with
+``python migrate.py`` before starting the app; the app itself never
+changes the schema.
+"""
+import importlib
+import pkgutil
+from types import ModuleType
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+# Arbitrary constant: serialises concurrent runners on Postgres
+_ADVISORY_LOCK_KEY = 4_242_001
+
+
+def load_migrations() -> List[ModuleType]:
+    modules = [
+        importlib.import_module(f"{__name__}.{info.name}")
+        for info in pkgutil.iter_modules(__path__)
+        if info.name.startswith("v")
+    ]
+    modules.sort(key=lambda m: m.VERSION)
+    versions = [m.VERSION for m in modules]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"Duplicate migration versions: {versions}")
+    return modules
+
+
+# ─── Helpers for migration modules ────────────────────────────
+def is_postgres(conn: AsyncConnection) -> bool:
+    return conn.dialect.name == "postgresql"
+
+
+async def column_exists(conn: AsyncConnection, table: str, column: str) -> bool:
+    def _check(sync_conn) -> bool:
+        from sqlalchemy import inspect
+        return column in {c["name"] for c in inspect(sync_conn).get_columns(table)}
+    return await conn.run_sync(_check)
+
+
+async def add_column(conn: AsyncConnection, table: str, column: str, ddl: str) -> None:
+    """ALTER TABLE ... ADD COLUMN unless it is already there (SQLite has no IF NOT EXISTS)."""
+    if not await column_exists(conn, table, column):
+        await conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+async def create_index(
+    conn: AsyncConnection, name: str, table: str, columns: str, unique: bool = False, include: str = ""
+) -> None:
+    """
+    Build an index without blocking writes.  On Postgres this is
+    CREATE INDEX CONCURRENTLY (call from a TRANSACTIONAL = False
+    migration); an invalid leftover from an interrupted build is
+    dropped first.  Elsewhere a plain CREATE INDEX.
+
+    ``include`` lists payload columns for a covering index: INCLUDE (...)
+    on Postgres, trailing key columns elsewhere.
+    """
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    if include and is_postgres(conn):
+        columns = f"{columns}) INCLUDE ({include}"
+    elif include:
+        columns = f"{columns}, {include}"
+    if is_postgres(conn):
+        invalid = (await conn.execute(text(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ), {"name": name})).first()
+        if invalid:
+            await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        await conn.execute(text(f"CREATE {kind} CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns})"))
+    else:
+        await conn.execute(text(f"CREATE {kind} IF NOT EXISTS {name} ON {table} ({columns})"))
+
+
+async def drop_index(conn: AsyncConnection, name: str) -> None:
+    concurrently = "CONCURRENTLY " if is_postgres(conn) else ""
+    await conn.execute(text(f"DROP INDEX {concurrently}IF EXISTS {name}"))
+
+
+# ─── Runner ───────────────────────────────────────────────────
+async def _ensure_table(engine: AsyncEngine) -> None:
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            " version INTEGER PRIMARY KEY,"
+            " description VARCHAR NOT NULL,"
+            " applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+        ))
+
+
+async def applied_versions(engine: AsyncEngine) -> List[int]:
+    await _ensure_table(engine)
+    async with engine.connect() as conn:
+        rows = await conn.execute(text("SELECT version FROM schema_migrations ORDER BY version"))
+        return [row.version for row in rows]
+
+
+async def _record(conn: AsyncConnection, migration: ModuleType) -> None:
+    await conn.execute(
+        text("INSERT INTO schema_migrations (version, description) VALUES (:v, :d)"),
+        {"v": migration.VERSION, "d": migration.DESCRIPTION},
+    )
+
+
+async def run_migrations(engine: AsyncEngine, target: Optional[int] = None) -> List[int]:
+    """Apply every pending migration up to ``target``; returns the versions applied."""
+    applied_now: List[int] = []
+    async with engine.connect() as lock_conn:
+        if is_postgres(lock_conn):
+            await lock_conn.execute(text("SELECT pg_advisory_lock(:k)"), {"k": _ADVISORY_LOCK_KEY})
+            await lock_conn.commit()
+        try:
+            done = set(await applied_versions(engine))
+            for migration in load_migrations():
+                if migration.VERSION in done or (target is not None and migration.VERSION > target):
+                    continue
+                print(f"Applying migration {migration.VERSION}: {migration.DESCRIPTION}")
+                if getattr(migration, "TRANSACTIONAL", True):
+                    async with engine.begin() as conn:
+                        await migration.upgrade(conn)
+                        await _record(conn, migration)
+                else:
+                    autocommit = engine.execution_options(isolation_level="AUTOCOMMIT")
+                    async with autocommit.connect() as conn:
+                        await migration.upgrade(conn)
+                    async with engine.begin() as conn:
+                        await _record(conn, migration)
+                applied_now.append(migration.VERSION)
+        finally:
+            if is_postgres(lock_conn):
+                await lock_conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": _ADVISORY_LOCK_KEY})
+                await lock_conn.commit()
+    return applied_now
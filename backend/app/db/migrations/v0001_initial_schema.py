@@ -0,0 +1,46 @@
+# Baseline: the tables as they were before versioned migrations (existing tables are left alone).
+# Pinned here, not taken from app.models: later model changes belong in later migrations.
+from sqlalchemy import Boolean, Column, Date, ForeignKey, Integer, LargeBinary, MetaData, String, Table
+
+VERSION = 1
+DESCRIPTION = "initial schema (users, tasks, micro_wins)"
+
+metadata = MetaData()
+
+Table(
+    "users", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String, unique=True, index=True),
+    Column("full_name", String, nullable=True),
+    Column("hashed_password", String, nullable=True),
+    Column("auth_provider", String),
+    Column("provider_id", String, nullable=True),
+    Column("encrypted_preferences", String, nullable=True),
+    Column("encrypted_struggle_areas", String, nullable=True),
+    Column("granularity_level", Integer),
+    Column("streak_count", Integer),
+    Column("last_completion_date", Date, nullable=True),
+    Column("total_completed", Integer),
+)
+
+Table(
+    "tasks", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("title", String, nullable=True),
+    Column("encrypted_goal", String, nullable=False),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=True),
+    Column("is_completed", Boolean),
+)
+
+Table(
+    "micro_wins", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("task_id", Integer, ForeignKey("tasks.id")),
+    Column("encrypted_action", LargeBinary, nullable=False),
+    Column("is_completed", Boolean),
+    Column("step_order", Integer),
+)
+
+
+async def upgrade(conn) -> None:
+    await conn.run_sync(metadata.create_all)
@@ -0,0 +1,15 @@
+# Formerly migrate_auth.py
+from sqlalchemy import text
+
+from app.db.migrations import add_column, is_postgres
+
+VERSION = 2
+DESCRIPTION = "users.auth_provider, users.provider_id; nullable hashed_password"
+
+
+async def upgrade(conn) -> None:
+    await add_column(conn, "users", "auth_provider", "VARCHAR DEFAULT 'email'")
+    await add_column(conn, "users", "provider_id", "VARCHAR")
+    if is_postgres(conn):
+        # Social login users have no password (SQLite tables are created nullable already)
+        await conn.execute(text("ALTER TABLE users ALTER COLUMN hashed_password DROP NOT NULL"))
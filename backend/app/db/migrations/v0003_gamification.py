@@ -0,0 +1,11 @@
+# Formerly migrate_gamification.py
+from app.db.migrations import add_column
+
+VERSION = 3
+DESCRIPTION = "users.streak_count, users.last_completion_date, users.total_completed"
+
+
+async def upgrade(conn) -> None:
+    await add_column(conn, "users", "streak_count", "INTEGER DEFAULT 0")
+    await add_column(conn, "users", "last_completion_date", "DATE")
+    await add_column(conn, "users", "total_completed", "INTEGER DEFAULT 0")
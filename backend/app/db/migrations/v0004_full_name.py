@@ -0,0 +1,9 @@
+# Formerly migrate_name.py
+from app.db.migrations import add_column
+
+VERSION = 4
+DESCRIPTION = "users.full_name"
+
+
+async def upgrade(conn) -> None:
+    await add_column(conn, "users", "full_name", "VARCHAR")
@@ -0,0 +1,25 @@
+# Denormalised step counts on tasks, backfilled from micro_wins
+from sqlalchemy import text
+
+from app.db.migrations import add_column
+
+VERSION = 5
+DESCRIPTION = "tasks.steps_total, tasks.steps_completed (backfilled)"
+
+
+async def upgrade(conn) -> None:
+    await add_column(conn, "tasks", "steps_total", "INTEGER NOT NULL DEFAULT 0")
+    await add_column(conn, "tasks", "steps_completed", "INTEGER NOT NULL DEFAULT 0")
+    # One pass over micro_wins; tasks without steps keep the 0 default
+    await conn.execute(text(
+        "UPDATE tasks SET"
+        " steps_total = counts.total,"
+        " steps_completed = counts.done"
+        " FROM ("
+        "  SELECT task_id,"
+        "   COUNT(*) AS total,"
+        "   SUM(CASE WHEN is_completed IS true THEN 1 ELSE 0 END) AS done"
+        "  FROM micro_wins WHERE task_id IS NOT NULL GROUP BY task_id"
+        " ) AS counts"
+        " WHERE tasks.id = counts.task_id"
+    ))
@@ -0,0 +1,22 @@
+# Covering indexes behind the hot read paths, built without blocking writes
+from app.db.migrations import create_index, drop_index
+
+VERSION = 6
+DESCRIPTION = "covering indexes (tasks.user_id, id DESC) and (micro_wins.task_id, step_order)"
+TRANSACTIONAL = False  # CREATE INDEX CONCURRENTLY
+
+
+async def upgrade(conn) -> None:
+    # Sidebar, paginated listing and export: WHERE user_id = ? ORDER BY id DESC.
+    # Includes every column the sidebar summary reads, so it never touches the heap.
+    await create_index(
+        conn, "ix_tasks_user_id_id_desc_progress", "tasks", "user_id, id DESC",
+        include="title, is_completed, steps_total, steps_completed",
+    )
+    # Task details, step counts and the all-done check: WHERE task_id = ? ORDER BY step_order
+    await create_index(
+        conn, "ix_micro_wins_task_id_step_order_cov", "micro_wins", "task_id, step_order", include="is_completed"
+    )
+    # Superseded by the two above (leading columns are covered)
+    await drop_index(conn, "ix_tasks_user_id_id")
+    await drop_index(conn, "ix_micro_wins_task_id")
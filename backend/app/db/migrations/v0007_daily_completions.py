@@ -0,0 +1,24 @@
+# Daily completion rollup behind the stats endpoints (DDL pinned here, like v0001)
+from sqlalchemy import Column, Date, ForeignKey, Integer, MetaData, Table
+
+VERSION = 7
+DESCRIPTION = "daily_completions rollup table"
+
+metadata = MetaData()
+
+# Referenced by the foreign key only; never created here
+Table("users", metadata, Column("id", Integer, primary_key=True))
+
+daily_completions = Table(
+    "daily_completions", metadata,
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    Column("day", Date, primary_key=True),
+    Column("tasks_completed", Integer, nullable=False, server_default="0"),
+    Column("steps_completed", Integer, nullable=False, server_default="0"),
+)
+
+
+async def upgrade(conn) -> None:
+    # Starts empty: completions before this migration carry no date, only
+    # the running totals on users (streak_count, total_completed)
+    await conn.run_sync(lambda sync_conn: daily_completions.create(sync_conn, checkfirst=True))
@@ -0,0 +1,10 @@
+# Leaderboard reads without scanning users
+from app.db.migrations import create_index
+
+VERSION = 8
+DESCRIPTION = "index users (total_completed DESC, id)"
+TRANSACTIONAL = False  # CREATE INDEX CONCURRENTLY
+
+
+async def upgrade(conn) -> None:
+    await create_index(conn, "ix_users_total_completed_id", "users", "total_completed DESC, id")
@@ -0,0 +1,13 @@
+# Gamification credit is given once per task, on its first completion
+from sqlalchemy import text
+
+from app.db.migrations import add_column
+
+VERSION = 9
+DESCRIPTION = "tasks.completion_credited (backfilled from is_completed)"
+
+
+async def upgrade(conn) -> None:
+    await add_column(conn, "tasks", "completion_credited", "BOOLEAN NOT NULL DEFAULT FALSE")
+    # Tasks completed so far were already credited
+    await conn.execute(text("UPDATE tasks SET completion_credited = TRUE WHERE is_completed IS TRUE"))
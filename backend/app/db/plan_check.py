@@ -0,0 +1,82 @@
+"""
+EXPLAIN-based guard for the hot query paths.
+
+Each entry names a query the API runs on every request of its kind and
+the index it must be served by.  check_plans() EXPLAINs them against the
+live database and reports any that would not use that index.  On
+Postgres sequential scans are disabled for the check, so a tiny table
+still shows whether the index is *usable* rather than what the planner
+picks for ten rows.
+"""
+import json
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# (name, SQL, required index)
+HOT_QUERIES: List[Tuple[str, str, str]] = [
+    (
+        "sidebar / task listing",
+        "SELECT id, title, is_completed, steps_total, steps_completed FROM tasks "
+        "WHERE user_id = 1 AND id < 1000000 ORDER BY id DESC LIMIT 21",
+        "ix_tasks_user_id_id_desc_progress",
+    ),
+    (
+        "task details steps",
+        "SELECT id, encrypted_action, is_completed, step_order FROM micro_wins "
+        "WHERE task_id = 1 ORDER BY step_order",
+        "ix_micro_wins_task_id_step_order_cov",
+    ),
+    (
+        "progress reconciliation counts",
+        "SELECT count(*), sum(CASE WHEN is_completed IS true THEN 1 ELSE 0 END) FROM micro_wins WHERE task_id = 1",
+        "ix_micro_wins_task_id_step_order_cov",
+    ),
+    (
+        "leaderboard top-N",
+        "SELECT id, total_completed, streak_count, last_completion_date FROM users "
+        "WHERE total_completed > 0 ORDER BY total_completed DESC, id LIMIT 100",
+        "ix_users_total_completed_id",
+    ),
+    (
+        "leaderboard ranked window",
+        "SELECT total_completed FROM users "
+        "WHERE total_completed > 0 ORDER BY total_completed DESC, id LIMIT 10000",
+        "ix_users_total_completed_id",
+    ),
+]
+
+
+def _pg_indexes(node: dict) -> List[str]:
+    found = [node["Index Name"]] if "Index Name" in node else []
+    for child in node.get("Plans", []):
+        found += _pg_indexes(child)
+    return found
+
+
+async def _explain(conn, sql: str) -> Tuple[List[str], str]:
+    """Index names used by ``sql`` and the raw plan text."""
+    if conn.dialect.name == "postgresql":
+        await conn.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = (await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return _pg_indexes(plan[0]["Plan"]), json.dumps(plan[0]["Plan"])
+    rows = (await conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))).all()
+    detail = "\n".join(str(row[-1]) for row in rows)
+    used = [word for row in rows for word in str(row[-1]).split() if word.startswith("ix_")]
+    return used, detail
+
+
+async def check_plans(engine: AsyncEngine) -> List[str]:
+    """Human-readable problems; empty when every hot query uses its index."""
+    problems = []
+    async with engine.connect() as conn:
+        for name, sql, index in HOT_QUERIES:
+            used, plan = await _explain(conn, sql)
+            if index not in used:
+                problems.append(f"{name}: expected index {index}, plan uses {used or 'no index'}\n{plan}")
+        # SET LOCAL dies with the transaction
+        await conn.rollback()
+    return problems
@@ -11,8 +11,8 @@ engine = create_async_engine(
     settings.DATABASE_URL, 
     echo=False,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
 )
 
 AsyncSessionLocal = async_sessionmaker(
@@ -21,6 +21,16 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False
 )
 
+def dialect_insert():
+    """INSERT construct with ON CONFLICT support for the configured database."""
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif engine.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upsert not supported on {engine.dialect.name}")
+    return insert
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
\ No newline at end of file
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, Date, ForeignKey
+from app.db.session import Base
+
+class DailyCompletion(Base):
+    """Per-user, per-day completion rollup; written incrementally when steps are toggled."""
+    __tablename__ = "daily_completions"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    tasks_completed = Column(Integer, nullable=False, default=0, server_default="0")
+    # Net: un-ticking a step the same day takes it back off
+    steps_completed = Column(Integer, nullable=False, default=0, server_default="0")
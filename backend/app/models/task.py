@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Boolean, LargeBinary, ForeignKey,String
+from sqlalchemy import Column, Integer, Boolean, LargeBinary, ForeignKey, String, Index
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 
@@ -10,6 +10,12 @@ class Task(Base):
     encrypted_goal = Column(String, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"))
     is_completed = Column(Boolean, default=False)
+
+    # Progress counters, kept in step with micro_wins by every write (see reconcile_progress.py)
+    steps_total = Column(Integer, nullable=False, default=0, server_default="0")
+    steps_completed = Column(Integer, nullable=False, default=0, server_default="0")
+    # Set on the first completion, never cleared: a task earns gamification credit once
+    completion_credited = Column(Boolean, nullable=False, default=False, server_default="false")
     
     # User Relationship
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True) # Set nullable=False later after auth
@@ -30,4 +36,18 @@ class MicroWinModel(Base):
     step_order = Column(Integer) # To keep steps in 1, 2, 3 order
 
     # Back-reference to the parent Task
-    parent_task = relationship("Task", back_populates="micro_wins")
\ No newline at end of file
+    parent_task = relationship("Task", back_populates="micro_wins")
+
+
+# ─── Indexes (built by migration v0006) ───────────────────────
+# Sidebar, paginated listing and export: WHERE user_id = ? ORDER BY id DESC.
+# Covers the sidebar summary's columns.
+Index(
+    "ix_tasks_user_id_id_desc_progress", Task.user_id, Task.id.desc(),
+    postgresql_include=["title", "is_completed", "steps_total", "steps_completed"],
+)
+# Task details, step counts and completion checks: WHERE task_id = ? ORDER BY step_order
+Index(
+    "ix_micro_wins_task_id_step_order_cov", MicroWinModel.task_id, MicroWinModel.step_order,
+    postgresql_include=["is_completed"],
+)
@@ -1,5 +1,5 @@
 # app/models/user.py
-from sqlalchemy import Column, Integer, String, Date
+from sqlalchemy import Column, Integer, String, Date, Index
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 
@@ -25,4 +25,9 @@ class User(Base):
     last_completion_date = Column(Date, nullable=True)
     total_completed = Column(Integer, default=0)
 
-    tasks = relationship("Task", back_populates="owner")
\ No newline at end of file
+    tasks = relationship("Task", back_populates="owner")
+
+
+# ─── Indexes (built by migration v0008) ───────────────────────
+# Leaderboard top-N and the score distribution behind percentiles
+Index("ix_users_total_completed_id", User.total_completed.desc(), User.id)
\ No newline at end of file
@@ -30,13 +30,25 @@ class MicroWinRead(BaseModel):
 
 class TaskRead(BaseModel):
     id: int
+    title: Optional[str] = None
     goal: str    # This will hold the DECRYPTED text
     is_completed: bool
-    micro_wins: List[MicroWinRead]
+    steps_total: int = 0
+    steps_completed: int = 0
+    micro_wins: List[MicroWinRead] = []  # Empty unless include_steps=true
 
     class Config:
         from_attributes = True
 
+# One page of the task listing; pass next_cursor back as ?cursor= for the next page
+class TaskPage(BaseModel):
+    items: List[TaskRead]
+    next_cursor: Optional[int] = None
 
+# Bulk step toggling: PATCH /api/v1/tasks/microwins
+class MicroWinStatusUpdate(BaseModel):
+    step_id: int
+    is_completed: bool
 
-
+class MicroWinBulkUpdate(BaseModel):
+    updates: List[MicroWinStatusUpdate] = Field(..., min_length=1, max_length=100)
@@ -34,6 +34,37 @@ class UserRead(BaseModel):
     class Config:
         from_attributes = True
 
+# Gamification stats: GET /api/v1/users/{user_id}/stats
+class DailyActivity(BaseModel):
+    day: str
+    tasks_completed: int = 0
+    steps_completed: int = 0
+
+class UserStats(BaseModel):
+    user_id: int
+    streak_count: int = 0
+    total_completed: int = 0
+    last_completion_date: Optional[str] = None
+    week_tasks_completed: int = 0
+    week_steps_completed: int = 0
+    rank: int
+    percentile: float  # Share of users with fewer completed tasks
+    total_users: int
+    history: List[DailyActivity] = []
+
+# GET /api/v1/users/leaderboard
+class LeaderboardEntry(BaseModel):
+    rank: int
+    display_name: str  # Anonymous handle, never the user's name or id
+    is_you: bool = False
+    total_completed: int
+    streak_count: int = 0
+
+class LeaderboardRead(BaseModel):
+    entries: List[LeaderboardEntry]
+    total_users: int
+    as_of: float  # Unix time the snapshot was taken
+
 # JWT Token Response
 class TokenResponse(BaseModel):
     access_token: str
@@ -0,0 +1,296 @@
+"""
+Admission control in front of the LLM.
+
+Three layers:
+  1. A per-user token bucket (burst + steady refill rate), checked by
+     rate_limit() before any Task row is created.
+  2. A global cap on concurrent upstream streams.
+  3. A bounded FIFO wait queue; streams that would overflow it are shed.
+
+Layers 2 and 3 are checked twice:
+  - admit(), in the request handler before the Task row exists: if the
+    slots, the queue and the capacity already claimed by other requests
+    still being set up are all taken, the request gets 429 + Retry-After.
+    Otherwise it holds a Claim on one place.
+  - stream(), around the real upstream call only (inside single-flight):
+    the Claim is turned into a slot or a queue place.  Cache hits and
+    coalesced subscribers just drop their Claim and never take a slot.
+    While queued, stream() yields Queued(position) markers, which
+    single-flight fans out to every subscriber.
+
+The slot belongs to the upstream task, not to any response, so it is
+released however that task ends (finished, failed or cancelled).  A
+Claim is released by the stream, or after ADMISSION_CLAIM_TTL_SECONDS if
+the response is never iterated (client gone before the body started).
+
+Queued streams wait at most LLM_QUEUE_TIMEOUT_SECONDS for a slot; a
+timeout there can only be reported in-stream, as the 200 is already out.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Deque, Dict, Optional, Union
+
+from app.core.config import settings
+
+# Keep the bucket map from growing forever with one-off users
+_MAX_TRACKED_BUCKETS = 10_000
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request must be shed; carries a Retry-After hint."""
+
+    def __init__(self, reason: str, retry_after: int) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class Queued:
+    """Yielded by AdmissionController.stream() while the upstream call waits for a slot."""
+
+    position: int
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, refill_per_sec: float) -> None:
+        self.capacity = capacity
+        self.refill_per_sec = refill_per_sec
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_sec)
+        self.updated = now
+
+    @property
+    def full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity
+
+    def try_take(self) -> float:
+        """Take one token. Returns 0 on success, else seconds until one is available."""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.refill_per_sec
+
+
+class Ticket:
+    """A reserved place: either already holding a slot or waiting in the queue."""
+
+    def __init__(self, controller: "AdmissionController", waiter: Optional[asyncio.Future]) -> None:
+        self._controller = controller
+        self._waiter = waiter
+        self._released = False
+        self.enqueued_at = time.monotonic()
+
+    @property
+    def granted(self) -> bool:
+        return self._waiter is None or (self._waiter.done() and not self._waiter.cancelled())
+
+    @property
+    def position(self) -> int:
+        """1-based position in the wait queue (0 once granted)."""
+        if self.granted:
+            return 0
+        return self._controller._queue.index(self._waiter) + 1
+
+    async def wait(self) -> None:
+        """Wait for a slot, raising asyncio.TimeoutError after the queue deadline."""
+        if self.granted:
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(self._waiter), self._controller.queue_timeout)
+        except asyncio.TimeoutError:
+            self._controller._timed_out += 1
+            raise
+        finally:
+            self._controller._record_wait(time.monotonic() - self.enqueued_at)
+
+    def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._controller._release(self)
+
+
+class Claim:
+    """Capacity set aside in the handler until the stream knows whether it needs the model."""
+
+    def __init__(self, controller: "AdmissionController", ttl: float) -> None:
+        self._controller = controller
+        self._live = True
+        # Safety net for responses that are never iterated
+        self._timer = asyncio.get_running_loop().call_later(ttl, self.release)
+
+    def release(self) -> None:
+        if not self._live:
+            return
+        self._live = False
+        self._timer.cancel()
+        self._controller._claimed -= 1
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_queue: int,
+        queue_timeout: float,
+        user_burst: int,
+        user_rate_per_minute: float,
+        claim_ttl: float,
+    ) -> None:
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.user_burst = user_burst
+        self.user_refill_per_sec = user_rate_per_minute / 60.0
+        self.claim_ttl = claim_ttl
+
+        self._active = 0
+        self._claimed = 0
+        self._queue: Deque[asyncio.Future] = deque()
+        self._buckets: Dict[int, TokenBucket] = {}
+
+        # ─── Metrics ──────────────────────────────────────────
+        self._admitted = 0
+        self._rate_limited = 0
+        self._queue_full = 0
+        self._timed_out = 0
+        self._recent_waits: Deque[float] = deque(maxlen=1000)
+        self._max_queue_depth = 0
+
+    def rate_limit(self, user_id: int) -> None:
+        """Take one token from ``user_id``'s bucket, or raise AdmissionRejected."""
+        wait_s = self._bucket(user_id).try_take()
+        if wait_s:
+            self._rate_limited += 1
+            raise AdmissionRejected("Too many requests, slow down.", math.ceil(wait_s))
+
+    def admit(self) -> Claim:
+        """Claim one place (slot or queue) before any work is done, or raise AdmissionRejected."""
+        if self._active + len(self._queue) + self._claimed >= self.max_concurrent + self.max_queue:
+            self._queue_full += 1
+            raise AdmissionRejected("Server is busy, please retry shortly.", math.ceil(self.queue_timeout))
+        self._claimed += 1
+        return Claim(self, self.claim_ttl)
+
+    def _reserve(self, claim: Optional[Claim] = None) -> Ticket:
+        """Turn ``claim`` into a slot or a queue place, or raise AdmissionRejected."""
+        if claim is not None:
+            claim.release()
+        if self._active < self.max_concurrent and not self._queue:
+            self._active += 1
+            self._admitted += 1
+            self._record_wait(0.0)
+            return Ticket(self, None)
+
+        if len(self._queue) >= self.max_queue:
+            self._queue_full += 1
+            raise AdmissionRejected("Server is busy, please retry shortly.", math.ceil(self.queue_timeout))
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._queue.append(waiter)
+        self._admitted += 1
+        self._max_queue_depth = max(self._max_queue_depth, len(self._queue))
+        return Ticket(self, waiter)
+
+    async def stream(
+        self, factory: Callable[[], AsyncIterator[str]], claim: Optional[Claim] = None
+    ) -> AsyncIterator[Union[str, Queued]]:
+        """Yield ``factory()``'s chunks while holding a slot; Queued(position) first if it has to wait."""
+        ticket = self._reserve(claim)
+        try:
+            if not ticket.granted:
+                yield Queued(ticket.position)
+                try:
+                    await ticket.wait()
+                except asyncio.TimeoutError:
+                    raise AdmissionRejected("Server is busy, please retry shortly.", math.ceil(self.queue_timeout))
+            async for chunk in factory():
+                yield chunk
+        finally:
+            ticket.release()
+
+    def try_slot(self) -> Optional[Ticket]:
+        """A slot right now or None; never queues.  For optional extra calls (hedges)."""
+        # Queued streams and claimed requests come first
+        if self._queue or self._active + self._claimed >= self.max_concurrent:
+            return None
+        self._active += 1
+        return Ticket(self, None)
+
+    def _bucket(self, user_id: int) -> TokenBucket:
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            if len(self._buckets) >= _MAX_TRACKED_BUCKETS:
+                # Full buckets carry no state worth keeping
+                for uid in [uid for uid, b in self._buckets.items() if b.full]:
+                    del self._buckets[uid]
+            bucket = TokenBucket(self.user_burst, self.user_refill_per_sec)
+            self._buckets[user_id] = bucket
+        return bucket
+
+    def _release(self, ticket: Ticket) -> None:
+        waiter = ticket._waiter
+        if waiter is not None and not ticket.granted:
+            # Left the queue before getting a slot (timeout or disconnect)
+            try:
+                self._queue.remove(waiter)
+            except ValueError:
+                pass
+            waiter.cancel()
+            return
+
+        self._active -= 1
+        # Hand the slot straight to the next live waiter
+        while self._queue:
+            nxt = self._queue.popleft()
+            if not nxt.done():
+                self._active += 1
+                nxt.set_result(None)
+                break
+
+    def _record_wait(self, seconds: float) -> None:
+        self._recent_waits.append(seconds)
+
+    def stats(self) -> dict:
+        waits = sorted(self._recent_waits)
+
+        def pct(p: float) -> float:
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 1)
+
+        return {
+            "active": self._active,
+            "claimed": self._claimed,
+            "max_concurrent": self.max_concurrent,
+            "queue_depth": len(self._queue),
+            "max_queue": self.max_queue,
+            "max_queue_depth_seen": self._max_queue_depth,
+            "admitted": self._admitted,
+            "rejected_rate_limited": self._rate_limited,
+            "rejected_queue_full": self._queue_full,
+            "queue_timeouts": self._timed_out,
+            "wait_ms_p50": pct(0.50),
+            "wait_ms_p95": pct(0.95),
+            "wait_ms_max": round(waits[-1] * 1000, 1) if waits else 0.0,
+        }
+
+
+admission = AdmissionController(
+    max_concurrent=settings.LLM_MAX_CONCURRENT_STREAMS,
+    max_queue=settings.LLM_QUEUE_MAX,
+    queue_timeout=settings.LLM_QUEUE_TIMEOUT_SECONDS,
+    user_burst=settings.USER_RATE_BURST,
+    user_rate_per_minute=settings.USER_RATE_PER_MINUTE,
+    claim_ttl=settings.ADMISSION_CLAIM_TTL_SECONDS,
+)
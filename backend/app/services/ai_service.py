@@ -1,49 +1,34 @@
 import json
-import re
+import logging
 import time
-from google import genai
-from google.genai import types
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import update, select
-from app.core.config import settings
+from typing import AsyncIterator, Optional
+from sqlalchemy import delete, select
 from app.schemas.task import MicroWin, TaskStreamChunk
-from app.models.task import MicroWinModel, Task
+from app.models.task import Task
 from app.models.user import User
-from app.core.security import encrypt_data, decrypt_data
+from app.db.session import AsyncSessionLocal
+from app.core.security import encrypt_data
+from app.services.stream_parser import JSONLinesParser
+from app.services.decomposition_cache import decomposition_cache, prompt_key
+from app.services.plaintext_cache import plaintext_cache
+from app.services.step_writer import StepWriter, StepWriteError
+from app.services.single_flight import single_flight
+from app.services.llm_resilience import llm_resilience, CircuitOpenError
+from app.services.llm_provider import LLMProvider, llm_provider
+from app.services.admission import admission, AdmissionRejected, Claim, Queued
+from app.services.change_tracker import sidebar_versions
 
-client = genai.Client(api_key=settings.GEMINI_API_KEY)
+logger = logging.getLogger(__name__)
+# Stream outcomes, reported under /api/v1/metrics
+_stats = {"completed": 0, "rejected": 0, "circuit_open": 0, "persist_failed": 0, "upstream_quota": 0, "failed": 0}
 
-_FENCE_RE = re.compile(r'^```(?:json)?\s*$', re.IGNORECASE)
 
-def _clean_line(line: str) -> str:
-    """Remove markdown fences and trim to bare JSON."""
-    line = line.strip()
-    if _FENCE_RE.match(line):
-        return ""
-    line = re.sub(r'^```(?:json)?\s*', '', line)
-    line = re.sub(r'\s*```$', '', line)
-    return line.strip()
+def _event(payload: dict) -> str:
+    return f"data: {json.dumps(payload)}\n\n"
 
 
-async def stream_micro_wins(safe_instruction: str, task_id: int, user_id: int, db: AsyncSession):
-    """
-    Fetches user neuro-profile, customizes the prompt, and streams tasks.
-    Includes latency metrics as SSE events to satisfy the <5s requirement.
-    """
-
-    t_start = time.perf_counter()
-    first_token_emitted = False
-
-    # 1. Fetch User Profile for Individualization
-    user_result = await db.execute(select(User).where(User.id == user_id))
-    user = user_result.scalar_one_or_none()
-    
-    # Decrypt preferences if they exist
-    preferences = decrypt_data(user.encrypted_preferences) if user and user.encrypted_preferences else "None"
-    struggles = decrypt_data(user.encrypted_struggle_areas) if user and user.encrypted_struggle_areas else "None"
-    granularity = user.granularity_level if user else 3
-
-    # 2. Compact prompt — fewer tokens = faster TTFT
+def _build_prompt(safe_instruction: str, granularity: int, struggles: str, preferences: str) -> str:
+    """Compact prompt — fewer tokens = faster TTFT."""
     detail_instruction = {
         1: "extremely brief, with only 2-3 words per step",
         2: "short and simple, with basic actions",
@@ -52,7 +37,7 @@ async def stream_micro_wins(safe_instruction: str, task_id: int, user_id: int, d
         5: "incredibly detailed, essentially micro-actions with how-to context"
     }.get(granularity, "moderate detail")
 
-    prompt = (
+    return (
         f"Break this goal into exactly 4 to 5 steps.\n"
         f"Detail Level: {detail_instruction} (granularity {granularity}/5).\n"
         f"Goal: {safe_instruction}\n"
@@ -63,109 +48,193 @@ async def stream_micro_wins(safe_instruction: str, task_id: int, user_id: int, d
         "{\"status\":\"end\"}"
     )
 
+
+async def _cached_chunks(entry: dict) -> AsyncIterator[str]:
+    """Replay a cached decomposition in the same JSON-lines format the model emits."""
+    lines = []
+    if entry.get("title"):
+        lines.append(json.dumps({"title": entry["title"]}))
+    lines.extend(json.dumps({"action": action}) for action in entry["steps"])
+    lines.append(json.dumps({"status": "end"}))
+    yield "\n".join(lines)
+
+
+async def _drop_empty_task(task_id: int, user_id: int) -> None:
+    """The model was never reached: remove the task created for this stream."""
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Task).where(Task.id == task_id))
+        await db.commit()
+    sidebar_versions.bump(user_id)
+
+
+async def stream_micro_wins(
+    safe_instruction: str,
+    task_id: int,
+    user_id: int,
+    provider: Optional[LLMProvider] = None,
+    claim: Optional[Claim] = None,
+):
+    """
+    Fetches user neuro-profile, customizes the prompt, and streams tasks.
+    Includes latency metrics as SSE events to satisfy the <5s requirement.
+    Identical prompts are served from the decomposition cache, and
+    concurrent identical prompts share a single upstream stream; only
+    that upstream stream turns its admission ``claim`` into a slot, the
+    others just release theirs.  While the upstream call is queued every
+    subscriber gets a {"queued_position": n} event.
+    ``provider`` defaults to the one selected by LLM_PROVIDER.
+
+    No DB connection is held while the model streams: the profile is
+    read in a short session up front and steps are written behind in
+    short bursts (see StepWriter), so a multi-second stream costs the
+    pool only a few milliseconds of checkout.
+    """
+    provider = provider or llm_provider
+
+    t_start = time.perf_counter()
+    first_token_emitted = False
+
+    # 1. Fetch User Profile for Individualization
+    async with AsyncSessionLocal() as db:
+        user_result = await db.execute(select(User).where(User.id == user_id))
+        user = user_result.scalar_one_or_none()
+
+    # Decrypt preferences if they exist
+    preferences, struggles = await plaintext_cache.decrypt(
+        "users", [(user.id, user.encrypted_preferences), (user.id, user.encrypted_struggle_areas)]
+    ) if user else (None, None)
+    preferences = preferences or "None"
+    struggles = struggles or "None"
+    granularity = user.granularity_level if user else 3
+
+    # 2. Build prompt and look it up in the cache
+    prompt = _build_prompt(safe_instruction, granularity, struggles, preferences)
+    cache_key = prompt_key(provider.model, prompt)
+    cached = decomposition_cache.get(cache_key)
+    writer = StepWriter(task_id, user_id)
+
     try:
-        # Use async streaming with fast non-thinking model
-        # Reverted to gemini-2.5-flash-lite to avoid the 'limit: 0' Free Tier quota issue on 2.0-flash
-        stream = await client.aio.models.generate_content_stream(
-            model='gemini-2.5-flash-lite',
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                temperature=0.7,
-                max_output_tokens=300,
-            ),
-        )
-
-        buffer = ""
+        if cached:
+            if claim is not None:
+                claim.release()
+            source = _cached_chunks(cached)
+        else:
+            source = single_flight.stream(
+                cache_key,
+                lambda: admission.stream(lambda: llm_resilience.stream(lambda: provider.stream(prompt)), claim),
+                on_coalesce=claim.release if claim is not None else None,
+            )
+
+        parser = JSONLinesParser()
         step_counter = 1
-        title_set = False  # Track if AI provided a title
-        
-        async for chunk in stream:
-            if chunk.text:
-                print(f"RAW CHUNK: {repr(chunk.text)}")
-                # ─── Time-to-First-Token ──────────────────────
+        title = None  # Set once the AI provides a title
+        actions = []  # Plain step texts, kept for the cache
+
+        async for text in source:
+            if isinstance(text, Queued):
+                # Replayed to late joiners too; stale once the model has answered
                 if not first_token_emitted:
-                    ttft_ms = round((time.perf_counter() - t_start) * 1000)
-                    yield f"data: {{\"latency_ms\": {ttft_ms}}}\n\n"
-                    first_token_emitted = True
-
-                buffer += chunk.text
-                
-                json_objects = re.findall(r'\{[^{}]*\}', buffer)
-                
-                if json_objects:
-                    last_match_end = buffer.rfind(json_objects[-1]) + len(json_objects[-1])
-                    buffer = buffer[last_match_end:] # Keep rest of buffer for next chunk
-                    
-                    for json_str in json_objects:
-                        try:
-                            raw_data = json.loads(json_str)
-
-                            # Handle AI-Generated Title
-                            if "title" in raw_data:
-                                stmt = update(Task).where(Task.id == task_id).values(title=raw_data["title"])
-                                await db.execute(stmt)
-                                await db.flush()
-                                title_set = True
-                                yield f"data: {{\"sidebar_title\": \"{raw_data['title']}\"}}\n\n"
-                                continue
-                            
-                            if raw_data.get("status") == "end":
-                                # Commit all flushed changes at once
-                                await db.commit()
-                                # ─── Total Latency ────────────────────
-                                total_ms = round((time.perf_counter() - t_start) * 1000)
-                                yield f"data: {{\"total_latency_ms\": {total_ms}}}\n\n"
-                                return 
-
-                            action_text = raw_data.get("action")
-                            if action_text:
-                                # Encrypting for Privacy-First Cloud storage
-                                encrypted_action = encrypt_data(action_text)
-                                
-                                new_step = MicroWinModel(
-                                    task_id=task_id,
-                                    encrypted_action=encrypted_action,
-                                    is_completed=False,
-                                    step_order=step_counter
-                                )
-                                db.add(new_step)
-                                # Flush to get IDs without committing
-                                await db.flush()
-
-                                # Yield for UI
-                                chunk_data = TaskStreamChunk(
-                                    id=task_id,
-                                    original_goal=safe_instruction,
-                                    current_step=MicroWin(
-                                        step_id=step_counter,
-                                        action=action_text
-                                    )
-                                )
-                                yield f"data: {chunk_data.model_dump_json()}\n\n"
-                                step_counter += 1
-
-                        except json.JSONDecodeError:
-                            continue
+                    yield _event({"queued_position": text.position})
+                continue
+
+            # ─── Time-to-First-Token ──────────────────────
+            if not first_token_emitted:
+                ttft_ms = round((time.perf_counter() - t_start) * 1000)
+                yield _event({"latency_ms": ttft_ms})
+                first_token_emitted = True
+
+            # Parser yields each object as soon as its closing brace arrives
+            for raw_data in parser.feed(text):
+                # Handle AI-Generated Title
+                if "title" in raw_data:
+                    writer.set_title(raw_data["title"])
+                    title = raw_data["title"]
+                    yield _event({"sidebar_title": raw_data["title"]})
+                    continue
+
+                if raw_data.get("status") == "end":
+                    # Persist all buffered steps and the title at once
+                    await writer.flush()
+                    # Only complete, explicitly terminated outputs are cached
+                    if cached is None:
+                        decomposition_cache.set(cache_key, title, actions)
+                    # ─── Total Latency ────────────────────
+                    total_ms = round((time.perf_counter() - t_start) * 1000)
+                    _stats["completed"] += 1
+                    yield _event({"total_latency_ms": total_ms})
+                    return
+
+                action_text = raw_data.get("action")
+                if action_text:
+                    # Encrypting for Privacy-First Cloud storage
+                    encrypted_action = encrypt_data(action_text)
+
+                    # Buffered, not written: the client gets the step right away
+                    writer.add_step(step_counter, encrypted_action)
+
+                    # Yield for UI
+                    chunk_data = TaskStreamChunk(
+                        id=task_id,
+                        original_goal=safe_instruction,
+                        current_step=MicroWin(
+                            step_id=step_counter,
+                            action=action_text
+                        )
+                    )
+                    yield f"data: {chunk_data.model_dump_json()}\n\n"
+                    actions.append(action_text)
+                    step_counter += 1
+                    if writer.due:
+                        await writer.flush()
 
         # Fallback title: if AI never provided one, use the instruction
-        if not title_set:
+        if title is None:
             fallback_title = safe_instruction[:40].strip()
             if len(safe_instruction) > 40:
                 fallback_title += "…"
-            stmt = update(Task).where(Task.id == task_id).values(title=fallback_title)
-            await db.execute(stmt)
-            yield f"data: {{\"sidebar_title\": \"{fallback_title}\"}}\n\n"
+            writer.set_title(fallback_title)
+            yield _event({"sidebar_title": fallback_title})
 
-        # Commit all remaining flushed changes
-        await db.commit()
+        # Persist all remaining buffered writes
+        await writer.flush()
         # If stream ends without explicit "end" status, still emit total latency
         total_ms = round((time.perf_counter() - t_start) * 1000)
-        yield f"data: {{\"total_latency_ms\": {total_ms}}}\n\n"
+        _stats["completed"] += 1
+        yield _event({"total_latency_ms": total_ms})
+
+    except AdmissionRejected as e:
+        _stats["rejected"] += 1
+        if not first_token_emitted:
+            await _drop_empty_task(task_id, user_id)
+        yield _event({"error": e.reason})
+
+    except StepWriteError:
+        _stats["persist_failed"] += 1
+        logger.exception("Step write failed for task %s", task_id)
+        yield _event({"error": "Couldn't save your steps. Please try again."})
+
+    except CircuitOpenError:
+        _stats["circuit_open"] += 1
+        yield _event({"error": "AI service is temporarily unavailable. Please try again shortly."})
 
     except Exception as e:
-        print(f"AI Stream Error: {str(e)}")
         # Check if it's a quota error
         if "429" in str(e) or "quota" in str(e).lower():
-             yield f"data: {{\"error\": \"Google AI Rate Limit Reached. Please wait a minute and try again.\"}}\n\n"
+            _stats["upstream_quota"] += 1
+            logger.warning("AI stream for task %s hit the upstream quota: %s", task_id, e)
+            yield _event({"error": "Google AI Rate Limit Reached. Please wait a minute and try again."})
         else:
-             yield f"data: {{\"error\": \"AI Stream Error: {str(e)}\"}}\n\n"
\ No newline at end of file
+            _stats["failed"] += 1
+            logger.exception("AI stream for task %s failed", task_id)
+            yield _event({"error": f"AI Stream Error: {e}"})
+
+    finally:
+        # Failed before the source was decided: the claimed place is not needed
+        if claim is not None:
+            claim.release()
+        # Steps already sent to the client are persisted even if it disconnected
+        await writer.close()
+
+
+def stats() -> dict:
+    return dict(_stats)
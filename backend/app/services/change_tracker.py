@@ -0,0 +1,55 @@
+"""
+Per-user change counters for cheap HTTP revalidation.
+
+Every write that can change what a user's sidebar shows (task created,
+titled, deleted, steps written or toggled) calls bump(user_id).  The
+sidebar's weak ETag is derived from the counter, so a matching
+If-None-Match is answered with 304 without touching the database.
+
+Counters live in process memory.  The process epoch in every tag makes
+tags from before a restart never match.  The app runs as a single
+uvicorn worker; with several workers each would need to see every
+write, so move the counters to a shared store before scaling out.
+"""
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+
+class ChangeTracker:
+    def __init__(self) -> None:
+        self._epoch = format(int(time.time() * 1000), "x")
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.not_modified = 0
+
+    def bump(self, *user_ids: Optional[int]) -> None:
+        with self._lock:
+            for user_id in user_ids:
+                if user_id is not None:
+                    self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+    def version(self, user_id: int) -> int:
+        return self._versions.get(user_id, 0)
+
+    def etag(self, user_id: int, *variant) -> str:
+        """Weak ETag for ``user_id``'s current version and a response variant (e.g. page params)."""
+        suffix = "-".join(str(v) for v in variant)
+        return f'W/"{self._epoch}-{self.version(user_id)}-{suffix}"'
+
+    def matches(self, etag: str, if_none_match: Optional[str]) -> bool:
+        """RFC 9110 weak comparison against an If-None-Match header."""
+        if not if_none_match:
+            return False
+        candidates: Iterable[str] = (tag.strip() for tag in if_none_match.split(","))
+        opaque = etag.removeprefix("W/")
+        matched = any(tag == "*" or tag.removeprefix("W/") == opaque for tag in candidates)
+        if matched:
+            self.not_modified += 1
+        return matched
+
+    def stats(self) -> dict:
+        return {"tracked_users": len(self._versions), "not_modified": self.not_modified}
+
+
+sidebar_versions = ChangeTracker()
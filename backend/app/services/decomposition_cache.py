@@ -0,0 +1,151 @@
+"""
+Content-addressed cache for finished decompositions.
+
+Keys are a SHA-256 of the final prompt (model + prompt text), so two
+requests share an entry only when the scrubbed goal, granularity,
+struggles and preferences all match.  Values are the plain title and
+step list; they are replayed through the normal SSE/DB path on a hit.
+
+Backends:
+  - "memory":   in-process LRU with TTL (default)
+  - "local_kv": JSON-serialised key/value store with per-key expiry,
+                a local stand-in for a shared store such as Redis
+  - "none":     caching disabled
+"""
+import hashlib
+import json
+import threading
+import time
+from typing import Dict, List, Optional, Protocol
+
+from app.core.config import settings
+from app.core.ttl_cache import TTLCache
+
+
+def prompt_key(model: str, prompt: str) -> str:
+    """Stable cache key for a model/prompt pair."""
+    return hashlib.sha256(f"{model}\x00{prompt}".encode("utf-8")).hexdigest()
+
+
+# ─── Backends ─────────────────────────────────────────────────
+class CacheBackend(Protocol):
+    """Minimal interface every backend implements."""
+
+    def get(self, key: str) -> Optional[dict]:
+        ...
+
+    def set(self, key: str, value: dict, ttl: float) -> None:
+        ...
+
+    def clear(self) -> None:
+        ...
+
+
+class InMemoryCacheBackend:
+    """Process-local LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int) -> None:
+        self._entries: TTLCache[dict] = TTLCache(max_entries)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            return self._entries.get(key)
+
+    def set(self, key: str, value: dict, ttl: float) -> None:
+        with self._lock:
+            self._entries.set(key, value, ttl)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class LocalKVCacheBackend:
+    """
+    Stores serialised bytes with an absolute expiry, the way a shared
+    key/value store would, evicting least recently used keys (like
+    Redis's allkeys-lru) once max_entries is reached.  Swapping in a real client only means
+    replacing _store/_expiry with network calls of the same shape.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self._max_entries = max_entries
+        self._store: Dict[str, bytes] = {}
+        self._expiry: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            raw = self._store.get(key)
+            if raw is None:
+                return None
+            if self._expiry[key] <= time.time():
+                del self._store[key], self._expiry[key]
+                return None
+            # Re-insert so dict order tracks recency
+            del self._store[key]
+            self._store[key] = raw
+        return json.loads(raw)
+
+    def set(self, key: str, value: dict, ttl: float) -> None:
+        raw = json.dumps(value).encode("utf-8")
+        with self._lock:
+            self._store.pop(key, None)
+            self._store[key] = raw
+            self._expiry[key] = time.time() + ttl
+            # Least recently used first: reads and writes move a key to the end
+            while len(self._store) > self._max_entries:
+                oldest = next(iter(self._store))
+                del self._store[oldest], self._expiry[oldest]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._store.clear()
+            self._expiry.clear()
+
+
+# ─── Cache Facade ─────────────────────────────────────────────
+class DecompositionCache:
+    """Validates entries and counts hits/misses around a backend."""
+
+    def __init__(self, backend: Optional[CacheBackend], ttl: float) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def get(self, key: str) -> Optional[dict]:
+        if self.backend is None:
+            return None
+        entry = self.backend.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def set(self, key: str, title: Optional[str], steps: List[str]) -> None:
+        # Only complete decompositions are worth replaying
+        if self.backend is None or not steps:
+            return
+        self.backend.set(key, {"title": title, "steps": list(steps)}, self.ttl)
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "hits": self.hits, "misses": self.misses}
+
+
+def _build_backend() -> Optional[CacheBackend]:
+    kind = settings.DECOMPOSE_CACHE_BACKEND.lower()
+    if kind == "none":
+        return None
+    if kind == "local_kv":
+        return LocalKVCacheBackend(settings.DECOMPOSE_CACHE_MAX_ENTRIES)
+    return InMemoryCacheBackend(settings.DECOMPOSE_CACHE_MAX_ENTRIES)
+
+
+decomposition_cache = DecompositionCache(_build_backend(), settings.DECOMPOSE_CACHE_TTL_SECONDS)
@@ -0,0 +1,65 @@
+"""
+Google access-token verification for the implicit sign-in flow.
+
+A token is verified by fetching its userinfo from Google over the
+shared keep-alive client.  Successful lookups are cached for
+GOOGLE_USERINFO_CACHE_TTL_SECONDS (keyed by a hash of the token, never
+the token itself), so a double-submitted login or a retry costs no
+second round-trip.  Failures are never cached.
+"""
+import hashlib
+from typing import Optional
+
+from app.core.config import settings
+from app.core.http_client import get_http_client
+from app.core.ttl_cache import TTLCache
+
+
+class GoogleUserinfoVerifier:
+    def __init__(self, url: str, ttl: float, max_entries: int) -> None:
+        self.url = url
+        self.ttl = ttl
+        # Its own small map; only touched from the event loop, so no lock
+        self._cache: TTLCache[dict] = TTLCache(max_entries, ttl)
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+
+    @staticmethod
+    def _key(access_token: str) -> str:
+        return hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+
+    async def userinfo(self, access_token: str) -> Optional[dict]:
+        """Google's userinfo for ``access_token``, or None if Google rejects it."""
+        key = self._key(access_token)
+        if self.ttl > 0:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+        self.misses += 1
+
+        resp = await get_http_client().get(self.url, headers={"Authorization": f"Bearer {access_token}"})
+        if resp.status_code != 200:
+            self.rejected += 1
+            return None
+        info = resp.json()
+        if self.ttl > 0:
+            self._cache.set(key, info)
+        return info
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "rejected": self.rejected,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+google_verifier = GoogleUserinfoVerifier(
+    url=settings.GOOGLE_USERINFO_URL,
+    ttl=settings.GOOGLE_USERINFO_CACHE_TTL_SECONDS,
+    max_entries=settings.GOOGLE_USERINFO_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,178 @@
+"""
+LLM providers for the decomposition stream.
+
+stream_micro_wins only depends on the LLMProvider protocol: something
+that turns a prompt into an async stream of raw text chunks.
+
+  - GeminiProvider: the real Google Gemini model.
+  - FakeLLMProvider: offline and deterministic, for load tests and
+    benchmarks.  Chunk boundaries, time-to-first-token, inter-chunk
+    delay, transient errors and 429s are all configurable.
+
+Select with LLM_PROVIDER="gemini" | "fake".
+"""
+import asyncio
+import hashlib
+import json
+import random
+import re
+from typing import AsyncIterator, List, Optional, Protocol
+
+from app.core.config import settings
+
+
+class LLMProvider(Protocol):
+    model: str
+
+    def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Yield raw text chunks for ``prompt``."""
+        ...
+
+    def warm_up(self) -> None:
+        """Do any expensive one-off setup (imports, clients) before traffic arrives."""
+        ...
+
+
+# ─── Gemini ───────────────────────────────────────────────────
+class GeminiProvider:
+    def __init__(self, api_key: str, model: str) -> None:
+        self.model = model
+        self._api_key = api_key
+        self._client = None
+
+    def _get_client(self):
+        # Built on first use so importing the app needs no network or key
+        if self._client is None:
+            from google import genai
+            self._client = genai.Client(api_key=self._api_key)
+        return self._client
+
+    def warm_up(self) -> None:
+        self._get_client()
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        from google.genai import types
+
+        # Use async streaming with fast non-thinking model
+        stream = await self._get_client().aio.models.generate_content_stream(
+            model=self.model,
+            contents=prompt,
+            config=types.GenerateContentConfig(
+                temperature=0.7,
+                max_output_tokens=300,
+            ),
+        )
+        async for chunk in stream:
+            if chunk.text:
+                yield chunk.text
+
+
+# ─── Offline Fake ─────────────────────────────────────────────
+class FakeRateLimitError(Exception):
+    """Looks like the 429 the Gemini SDK raises when quota runs out."""
+
+
+class FakeUpstreamError(ConnectionError):
+    """A transient upstream failure (retryable)."""
+
+
+_GOAL_RE = re.compile(r"^Goal: (.*)$", re.MULTILINE)
+
+
+class FakeLLMProvider:
+    """
+    Replays a deterministic decomposition for each prompt.
+
+    The output text depends only on the prompt; the sequence of injected
+    faults depends only on the seed and call order, so runs are repeatable.
+    """
+
+    model = "fake-llm"
+
+    def __init__(
+        self,
+        chunk_sizes: List[int],
+        ttft_ms: int = 300,
+        chunk_delay_ms: int = 20,
+        steps: int = 5,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        seed: int = 0,
+        fence: bool = False,
+    ) -> None:
+        self.chunk_sizes = [size for size in chunk_sizes if size > 0] or [16]
+        self.ttft_ms = ttft_ms
+        self.chunk_delay_ms = chunk_delay_ms
+        self.steps = steps
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.fence = fence
+        self._rng = random.Random(seed)
+        self.calls = 0
+
+    def warm_up(self) -> None:
+        pass
+
+    def render(self, prompt: str) -> str:
+        """The full text the fake model 'generates' for ``prompt``."""
+        match = _GOAL_RE.search(prompt)
+        goal = match.group(1).strip() if match else "your goal"
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:6]
+        lines = [json.dumps({"title": f"{goal[:24].strip()} plan"})]
+        lines += [
+            json.dumps({"action": f"Step {i} of '{goal}': do part {i} ({digest})"})
+            for i in range(1, self.steps + 1)
+        ]
+        lines.append(json.dumps({"status": "end"}))
+        text = "\n".join(lines)
+        return f"```json\n{text}\n```" if self.fence else text
+
+    def _split(self, text: str) -> List[str]:
+        chunks, pos, i = [], 0, 0
+        while pos < len(text):
+            size = self.chunk_sizes[i % len(self.chunk_sizes)]
+            chunks.append(text[pos:pos + size])
+            pos += size
+            i += 1
+        return chunks
+
+    def _pick_fault(self, n_chunks: int) -> Optional[tuple]:
+        roll = self._rng.random()
+        if roll < self.rate_limit_rate:
+            return 0, FakeRateLimitError("429 RESOURCE_EXHAUSTED: quota exceeded (fake)")
+        if roll < self.rate_limit_rate + self.error_rate:
+            return self._rng.randrange(n_chunks + 1), FakeUpstreamError("503 UNAVAILABLE (fake)")
+        return None
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        self.calls += 1
+        chunks = self._split(self.render(prompt))
+        fault = self._pick_fault(len(chunks))
+
+        await asyncio.sleep(self.ttft_ms / 1000)
+        for index, chunk in enumerate(chunks):
+            if fault and fault[0] == index:
+                raise fault[1]
+            if index:
+                await asyncio.sleep(self.chunk_delay_ms / 1000)
+            yield chunk
+        if fault and fault[0] == len(chunks):
+            raise fault[1]
+
+
+def build_provider() -> LLMProvider:
+    if settings.LLM_PROVIDER.lower() == "fake":
+        return FakeLLMProvider(
+            chunk_sizes=settings.FAKE_LLM_CHUNK_SIZES,
+            ttft_ms=settings.FAKE_LLM_TTFT_MS,
+            chunk_delay_ms=settings.FAKE_LLM_CHUNK_DELAY_MS,
+            steps=settings.FAKE_LLM_STEPS,
+            error_rate=settings.FAKE_LLM_ERROR_RATE,
+            rate_limit_rate=settings.FAKE_LLM_RATE_LIMIT_RATE,
+            seed=settings.FAKE_LLM_SEED,
+        )
+    # Reverted to gemini-2.5-flash-lite to avoid the 'limit: 0' Free Tier quota issue on 2.0-flash
+    return GeminiProvider(api_key=settings.GEMINI_API_KEY, model="gemini-2.5-flash-lite")
+
+
+llm_provider: LLMProvider = build_provider()
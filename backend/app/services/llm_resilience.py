@@ -0,0 +1,315 @@
+"""
+Resilience layer around the upstream LLM stream.
+
+  - Time-to-first-token deadline: a stream that has produced nothing
+    after LLM_TTFT_DEADLINE_SECONDS is abandoned.
+  - Hedging: if the first token is later than LLM_HEDGE_AFTER_SECONDS a
+    second identical request is started; whichever answers first wins
+    and the other is cancelled.  A hedge needs an admission slot of its
+    own (taken without queueing, held only until the race is decided);
+    with none free the primary just keeps waiting.
+  - Retries: transient failures before the first chunk is handed to the
+    caller are retried with jittered exponential backoff.  Once a chunk
+    has been forwarded the stream is never restarted (steps may already
+    be persisted and shown).
+  - Circuit breaker: after repeated failures calls fail fast until a
+    cool-down has passed, then a single trial call is let through.
+    Each request records exactly one outcome, when its stream ends;
+    upstream 429s and cancellations before any answer record none.
+"""
+import asyncio
+import random
+import time
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.admission import Ticket, admission
+
+StreamFactory = Callable[[], AsyncIterator[str]]
+
+
+_TRANSIENT_MARKERS = ("500", "502", "503", "504", "unavailable", "deadline", "timeout", "reset")
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the upstream while the breaker is open."""
+
+
+class FirstTokenTimeout(Exception):
+    """No chunk arrived before the time-to-first-token deadline."""
+
+
+def _is_quota(exc: BaseException) -> bool:
+    message = str(exc).lower()
+    return "429" in message or "quota" in message
+
+
+def _is_transient(exc: BaseException) -> bool:
+    if isinstance(exc, (FirstTokenTimeout, asyncio.TimeoutError, ConnectionError)):
+        return True
+    # Quota errors are not retried: retrying only burns more quota
+    if _is_quota(exc):
+        return False
+    message = str(exc).lower()
+    return any(marker in message for marker in _TRANSIENT_MARKERS)
+
+
+# ─── Circuit Breaker ──────────────────────────────────────────
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self._state = self.CLOSED
+        self._failures = 0
+        self._trial_in_flight = False
+
+    def release(self) -> None:
+        """The call was abandoned (cancelled) without an outcome: let another trial through."""
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                self.times_opened += 1
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+
+# ─── Resilient Stream ─────────────────────────────────────────
+class ResilientStream:
+    def __init__(
+        self,
+        breaker: CircuitBreaker,
+        ttft_deadline: float,
+        hedge_after: float,
+        max_retries: int,
+        retry_base: float,
+        idle_timeout: float,
+        hedge_slot: Optional[Callable[[], Optional[Ticket]]] = None,
+    ) -> None:
+        self.breaker = breaker
+        self.ttft_deadline = ttft_deadline
+        self.hedge_after = hedge_after
+        self.max_retries = max_retries
+        self.retry_base = retry_base
+        self.idle_timeout = idle_timeout
+        self.hedge_slot = hedge_slot
+
+        # ─── Metrics ──────────────────────────────────────────
+        self.calls = 0
+        self.retries = 0
+        self.hedges_launched = 0
+        self.hedge_wins = 0
+        self.hedges_skipped = 0  # No free admission slot for the hedge
+        self.ttft_timeouts = 0
+        self.failures = 0
+
+    async def stream(self, factory: StreamFactory) -> AsyncIterator[str]:
+        """Yield chunks from ``factory()`` with deadline, hedging, retries and breaker."""
+        self.calls += 1
+        # One breaker decision per request, however many retries it takes
+        if not self.breaker.allow():
+            raise CircuitOpenError("AI service temporarily unavailable")
+        # ...and one outcome, recorded when the stream ends: True/False, or None for "no verdict"
+        outcome: Optional[bool] = None
+        answered = False
+        iterator: Optional[AsyncIterator[str]] = None
+        try:
+            attempt = 0
+            while True:
+                try:
+                    first, iterator = await self._first_chunk(factory)
+                except Exception as e:
+                    self.failures += 1
+                    if attempt < self.max_retries and _is_transient(e):
+                        attempt += 1
+                        self.retries += 1
+                        # Full jitter: spread retries out so they don't stampede
+                        await asyncio.sleep(random.uniform(0, self.retry_base * (2 ** attempt)))
+                        continue
+                    raise
+                break
+
+            if iterator is not None:
+                answered = True
+                yield first
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(iterator.__anext__(), self.idle_timeout)
+                    except StopAsyncIteration:
+                        break
+                    except Exception:
+                        self.failures += 1
+                        raise
+                    yield chunk
+            outcome = True
+        except Exception as e:
+            # A 429 says nothing about upstream health: no verdict either way
+            outcome = None if _is_quota(e) else False
+            raise
+        except BaseException:
+            # Cancelled or closed by the consumer: a stream that was already answering was healthy
+            outcome = True if answered else None
+            raise
+        finally:
+            if iterator is not None:
+                await _close(iterator)
+            if outcome is True:
+                self.breaker.record_success()
+            elif outcome is False:
+                self.breaker.record_failure()
+            else:
+                # A half-open trial must not stay claimed
+                self.breaker.release()
+
+    async def _first_chunk(self, factory: StreamFactory) -> Tuple[Optional[str], Optional[AsyncIterator[str]]]:
+        """
+        Race the primary (and, if late, a hedge) to the first chunk.
+        Returns (first_chunk, iterator) of the winner, or (None, None) for an empty stream.
+        """
+        deadline = time.monotonic() + self.ttft_deadline
+        # (iterator, pending __anext__ task, is_hedge)
+        contenders: List[Tuple[AsyncIterator[str], asyncio.Task, bool]] = []
+
+        def start(is_hedge: bool) -> None:
+            iterator = factory().__aiter__()
+            contenders.append((iterator, asyncio.ensure_future(iterator.__anext__()), is_hedge))
+
+        start(False)
+        hedged = False
+        hedge_slot: Optional[Ticket] = None
+        last_error: Optional[BaseException] = None
+        try:
+            while contenders:
+                pending = {task for _, task, _ in contenders}
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                wait_for = remaining
+                if not hedged and self.hedge_after > 0:
+                    wait_for = min(remaining, max(0.0, self.hedge_after - (self.ttft_deadline - remaining)))
+
+                done, _ = await asyncio.wait(pending, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # Primary is late: fire a hedge once, if the breaker is healthy
+                    if not hedged and self.hedge_after > 0:
+                        hedged = True
+                        if self.breaker.state == CircuitBreaker.CLOSED:
+                            # A second upstream stream counts against the concurrency cap too
+                            hedge_slot = self.hedge_slot() if self.hedge_slot is not None else None
+                            if self.hedge_slot is not None and hedge_slot is None:
+                                self.hedges_skipped += 1
+                            else:
+                                self.hedges_launched += 1
+                                start(True)
+                    continue
+
+                for contender in list(contenders):
+                    iterator, task, is_hedge = contender
+                    if task not in done:
+                        continue
+                    contenders.remove(contender)
+                    try:
+                        first = task.result()
+                    except StopAsyncIteration:
+                        first = None
+                    except Exception as e:
+                        # This contender failed; keep waiting for the other one
+                        last_error = e
+                        await _close(iterator)
+                        continue
+                    if is_hedge:
+                        self.hedge_wins += 1
+                    if first is None:
+                        await _close(iterator)
+                        return None, None
+                    return first, iterator
+
+            if last_error is not None and not contenders:
+                raise last_error
+            self.ttft_timeouts += 1
+            raise FirstTokenTimeout(f"No response from AI within {self.ttft_deadline:.0f}s")
+        finally:
+            # Cancel whoever lost the race (or everyone, on failure)
+            for iterator, task, _ in contenders:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                await _close(iterator)
+            # Only one upstream stream is left, covered by the caller's own slot
+            if hedge_slot is not None:
+                hedge_slot.release()
+
+    def stats(self) -> dict:
+        return {
+            "breaker": self.breaker.stats(),
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "ttft_timeouts": self.ttft_timeouts,
+            "hedges_launched": self.hedges_launched,
+            "hedge_wins": self.hedge_wins,
+            "hedges_skipped": self.hedges_skipped,
+            "hedge_win_rate": round(self.hedge_wins / self.hedges_launched, 3) if self.hedges_launched else 0.0,
+        }
+
+
+async def _close(iterator: AsyncIterator[str]) -> None:
+    aclose = getattr(iterator, "aclose", None)
+    if aclose is None:
+        return
+    try:
+        await aclose()
+    except Exception:
+        pass
+
+
+llm_resilience = ResilientStream(
+    breaker=CircuitBreaker(
+        failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=settings.LLM_BREAKER_RESET_SECONDS,
+    ),
+    ttft_deadline=settings.LLM_TTFT_DEADLINE_SECONDS,
+    hedge_after=settings.LLM_HEDGE_AFTER_SECONDS,
+    max_retries=settings.LLM_MAX_RETRIES,
+    retry_base=settings.LLM_RETRY_BASE_SECONDS,
+    idle_timeout=settings.LLM_STREAM_IDLE_TIMEOUT_SECONDS,
+    hedge_slot=admission.try_slot,
+)
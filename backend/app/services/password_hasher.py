@@ -0,0 +1,125 @@
+"""
+Dedicated, bounded executor for bcrypt.
+
+Password hashing is deliberately slow (~250 ms of CPU per call).  It
+runs on its own pool, sized by PASSWORD_HASH_WORKERS and optionally
+process-based, so a login storm can neither block the event loop nor
+starve the default executor that other work relies on.
+
+At most PASSWORD_HASH_QUEUE_MAX calls may be running or waiting; past
+that, callers get a 503 with Retry-After instead of an ever-growing
+backlog.
+"""
+import asyncio
+import math
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Deque, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.security import hash_password, verify_password
+
+
+def _timed(fn, *args) -> Tuple[object, float]:
+    """Runs in the worker: the call's result plus its pure CPU time."""
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - t0
+
+
+class PasswordHasher:
+    def __init__(self, workers: int, max_pending: int, use_processes: bool = False) -> None:
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.use_processes = use_processes
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+
+        # ─── Metrics ──────────────────────────────────────────
+        self._completed = 0
+        self._rejected = 0
+        self._max_pending_seen = 0
+        self._hash_times: Deque[float] = deque(maxlen=1000)
+        self._wait_times: Deque[float] = deque(maxlen=1000)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.use_processes:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self._pending >= self.max_pending:
+            self._rejected += 1
+            # Rough time to drain the backlog ahead of a retry
+            drain_s = self._pending / self.workers * (self._median(self._hash_times) or 0.25)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many sign-in attempts right now, please retry shortly.",
+                headers={"Retry-After": str(max(1, math.ceil(drain_s)))},
+            )
+
+        self._pending += 1
+        self._max_pending_seen = max(self._max_pending_seen, self._pending)
+        t0 = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, cpu_s = await loop.run_in_executor(self._get_executor(), _timed, fn, *args)
+        finally:
+            self._pending -= 1
+        self._completed += 1
+        self._hash_times.append(cpu_s)
+        self._wait_times.append(time.perf_counter() - t0 - cpu_s)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @staticmethod
+    def _median(values) -> float:
+        ordered = sorted(values)
+        return ordered[len(ordered) // 2] if ordered else 0.0
+
+    def stats(self) -> dict:
+        def pct(values, p: float) -> float:
+            ordered = sorted(values)
+            if not ordered:
+                return 0.0
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 1)
+
+        return {
+            "mode": "process" if self.use_processes else "thread",
+            "workers": self.workers,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "max_pending_seen": self._max_pending_seen,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "hash_ms_p50": pct(self._hash_times, 0.50),
+            "hash_ms_p95": pct(self._hash_times, 0.95),
+            "queue_wait_ms_p50": pct(self._wait_times, 0.50),
+            "queue_wait_ms_p95": pct(self._wait_times, 0.95),
+        }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_QUEUE_MAX,
+    use_processes=settings.PASSWORD_HASH_USE_PROCESSES,
+)
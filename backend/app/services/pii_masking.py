@@ -0,0 +1,92 @@
+"""
+Span-based PII masking.
+
+Entities are collected as (start, end, label) character spans — from
+regexes for emails, phone numbers and URLs, and from spaCy NER — and the
+output is rebuilt in a single pass.  Nothing is searched for again after
+a placeholder has been inserted, so one replacement can never corrupt
+another.  Kept free of spaCy/settings imports so it can be benchmarked
+on its own.
+"""
+import re
+from typing import Iterable, List, Sequence, Tuple
+
+Span = Tuple[int, int, str]
+
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_URL_RE = re.compile(r"\b(?:https?://|www\.)[^\s<>\"']+", re.IGNORECASE)
+_PHONE_RE = re.compile(r"(?<![\w+])\+?\d[\d ().-]{6,}\d(?!\w)")
+_MIN_PHONE_DIGITS = 9
+
+# PII that regexes catch more reliably (and far more cheaply) than NER
+PATTERN_LABELS = (("EMAIL", _EMAIL_RE), ("URL", _URL_RE), ("PHONE", _PHONE_RE))
+
+_ALPHA_RE = re.compile(r"[^\W\d_]")
+
+
+def pattern_spans(text: str, labels: Iterable[str]) -> List[Span]:
+    """Spans for the regex-detected labels that are enabled."""
+    enabled = set(labels)
+    spans: List[Span] = []
+    for label, pattern in PATTERN_LABELS:
+        if label not in enabled:
+            continue
+        for m in pattern.finditer(text):
+            # Dates and version numbers look like short phone numbers
+            if label == "PHONE" and sum(c.isdigit() for c in m.group()) < _MIN_PHONE_DIGITS:
+                continue
+            spans.append((m.start(), m.end(), label))
+    return spans
+
+
+def needs_ner(text: str, ner_labels: Iterable[str]) -> bool:
+    """
+    False only when spaCy cannot add anything: no NER labels are enabled,
+    or no letter is left once emails/URLs/phones are taken out.  Casing
+    is deliberately not trusted: users type names in lower case too.
+    """
+    if not set(ner_labels):
+        return False
+    residue = text
+    for _, pattern in PATTERN_LABELS:
+        residue = pattern.sub(" ", residue)
+    return _ALPHA_RE.search(residue) is not None
+
+
+def repeat_spans(text: str, spans: Sequence[Span]) -> List[Span]:
+    """
+    Other occurrences of already-detected entity texts, so a name tagged
+    once is masked everywhere it appears.  One combined regex, one scan.
+    """
+    by_text, tagged = {}, {}
+    for start, end, label in spans:
+        entity = text[start:end]
+        by_text.setdefault(entity, label)
+        tagged[entity] = tagged.get(entity, 0) + 1
+    # Only texts that occur more often than they were tagged need a search
+    alternatives = sorted(
+        (entity for entity in by_text if text.count(entity) > tagged[entity]), key=len, reverse=True
+    )
+    if not alternatives:
+        return []
+    pattern = re.compile(r"(?<!\w)(?:" + "|".join(map(re.escape, alternatives)) + r")(?!\w)")
+    return [(m.start(), m.end(), by_text[m.group()]) for m in pattern.finditer(text)]
+
+
+def mask_spans(text: str, spans: Iterable[Span]) -> str:
+    """Replace each span with "[LABEL]" in one pass; overlapping spans are merged into the first."""
+    pieces: List[str] = []
+    cursor = 0
+    # Earliest first; for equal starts the longest span wins
+    for start, end, label in sorted(spans, key=lambda s: (s[0], -s[1])):
+        if start < cursor:
+            # Overlaps the previous placeholder: swallow any tail sticking out
+            cursor = max(cursor, end)
+            continue
+        pieces.append(text[cursor:start])
+        pieces.append(f"[{label}]")
+        cursor = end
+    if not pieces:
+        return text
+    pieces.append(text[cursor:])
+    return "".join(pieces)
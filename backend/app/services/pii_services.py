@@ -1,20 +1,230 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional, Set, Tuple
+
 import spacy
 
-# Lazy-load the NLP model on first use to speed up server startup
+from app.core.config import settings
+from app.services.pii_masking import PATTERN_LABELS, mask_spans, needs_ner, pattern_spans, repeat_spans
+
+# NER only needs the tokenizer, tok2vec and ner components; skip loading the rest
+_EXCLUDED_PIPES = ["tagger", "parser", "attribute_ruler", "lemmatizer", "senter"]
+
+# Loaded by warm_up() at startup; lazy-loaded on first use as a fallback
 _nlp = None
 
 def _get_nlp():
     global _nlp
     if _nlp is None:
-        _nlp = spacy.load("en_core_web_sm")
+        _nlp = spacy.load("en_core_web_sm", exclude=_EXCLUDED_PIPES)
     return _nlp
 
+# Labels to mask, split into regex-detected ones and spaCy NER ones
+_PATTERN_LABELS = {label for label, _ in PATTERN_LABELS}
+_MASK_LABELS = frozenset(settings.PII_LABELS)
+_NER_LABELS = _MASK_LABELS - _PATTERN_LABELS
+
+def _mask(text: str, doc=None) -> str:
+    """Mask regex matches and (if a doc is given) NER entities in one pass."""
+    spans = pattern_spans(text, _MASK_LABELS)
+    if doc is not None:
+        ner_spans = [
+            (ent.start_char, ent.end_char, ent.label_) for ent in doc.ents if ent.label_ in _NER_LABELS
+        ]
+        # Also catch repeat mentions spaCy tagged only once
+        spans += ner_spans + repeat_spans(text, ner_spans)
+    return mask_spans(text, spans)
+
+def warm_up() -> None:
+    """Load the model and push one document through NER so first requests are hot."""
+    _get_nlp()("Warm-up: Jane Doe flew from Paris to Berlin for Acme Corp.")
+
+def is_trivially_clean(text: str) -> bool:
+    """True when spaCy cannot find anything to mask, so the NER call can be skipped."""
+    return not needs_ner(text, _NER_LABELS)
+
 def scrub_pii(text: str) -> str:
-    nlp = _get_nlp()
-    doc = nlp(text)
-    scrubbed_text = text
-    # Masking Persons, Locations, and Organizations
-    for ent in doc.ents:
-        if ent.label_ in ["PERSON", "GPE", "ORG"]:
-            scrubbed_text = scrubbed_text.replace(ent.text, f"[{ent.label_}]")
-    return scrubbed_text
\ No newline at end of file
+    if is_trivially_clean(text):
+        return _mask(text)
+    return _mask(text, _get_nlp()(text))
+
+def scrub_pii_batch(texts: List[str]) -> List[str]:
+    """Scrub many texts with one nlp.pipe call (runs in a worker thread or process)."""
+    results = [None] * len(texts)
+    ner_indexes = []
+    for i, text in enumerate(texts):
+        if is_trivially_clean(text):
+            results[i] = _mask(text)
+        else:
+            ner_indexes.append(i)
+    if ner_indexes:
+        docs = _get_nlp().pipe([texts[i] for i in ner_indexes], batch_size=len(ner_indexes))
+        for i, doc in zip(ner_indexes, docs):
+            results[i] = _mask(texts[i], doc)
+    return results
+
+
+# ─── Micro-batching Scrubber ─────────────────────────────────
+def _fail(batch: List[Tuple[str, asyncio.Future]], error: BaseException) -> None:
+    for _, future in batch:
+        if not future.done():
+            future.set_exception(error)
+
+
+class PIIScrubber:
+    """
+    Collects concurrent scrub requests into small batches and runs each
+    batch through nlp.pipe off the event loop.
+
+    A batch closes when it reaches ``max_batch`` texts or ``max_wait_ms``
+    after its first text.  At most one batch per worker is in flight, so
+    while workers are busy new requests pile up into the next, larger batch.
+    With ``process_workers`` > 0 batches run in a process pool (one model
+    per process, no GIL contention); otherwise in one dedicated thread.
+    """
+
+    def __init__(self, max_batch: int, max_wait_ms: int, process_workers: int) -> None:
+        self.max_batch = max(max_batch, 1)
+        self.max_wait = max_wait_ms / 1000
+        self.process_workers = process_workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._runner: Optional[asyncio.Task] = None
+        # Strong refs so running batches are not garbage-collected mid-way
+        self._batches: Set[asyncio.Task] = set()
+        self._executor: Optional[Executor] = None
+
+        # ─── Metrics ──────────────────────────────────────────
+        self.batches = 0
+        self.texts = 0
+        self.fast_path = 0
+
+    @property
+    def workers(self) -> int:
+        return self.process_workers if self.process_workers > 0 else 1
+
+    def _ensure_started(self) -> None:
+        if self._runner is not None and not self._runner.done():
+            return
+        if self._executor is None:
+            if self.process_workers > 0:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.process_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_get_nlp,
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pii")
+        # Kept across restarts: callers already queued are picked up by the new collector
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.workers)
+        self._runner = asyncio.create_task(self._collect())
+
+    async def scrub(self, text: str) -> str:
+        """Scrub one text; concurrent callers share nlp.pipe batches."""
+        # Regex-only inputs never need to wait for a batch
+        if is_trivially_clean(text):
+            self.fast_path += 1
+            return _mask(text)
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._slots.acquire()
+            batch: List[Tuple[str, asyncio.Future]] = []
+            try:
+                batch.append(await self._queue.get())
+                deadline = loop.time() + self.max_wait
+                while len(batch) < self.max_batch:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            except BaseException:
+                self._slots.release()
+                if self._runner is asyncio.current_task():
+                    # Died mid-batch: hand the texts back to the next collector
+                    for item in batch:
+                        self._queue.put_nowait(item)
+                else:
+                    _fail(batch, RuntimeError("PII scrubber is shut down"))
+                raise
+            task = asyncio.create_task(self._process(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _process(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        texts = [text for text, _ in batch]
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self._executor, scrub_pii_batch, texts
+            )
+        except Exception as e:
+            _fail(batch, e)
+        except BaseException:
+            # Cancelled: no caller may be left waiting on a future nobody resolves
+            _fail(batch, RuntimeError("PII batch cancelled"))
+            raise
+        else:
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._slots.release()
+            self.batches += 1
+            self.texts += len(batch)
+
+    async def warm_up(self) -> None:
+        """Load and exercise the model wherever batches will run (thread or every worker process)."""
+        self._ensure_started()
+        loop = asyncio.get_running_loop()
+        # One concurrent job per worker makes the pool start all of its processes
+        await asyncio.gather(*(
+            loop.run_in_executor(self._executor, warm_up) for _ in range(self.workers)
+        ))
+
+    def shutdown(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            self._runner = None
+        # Nobody will collect these any more
+        while self._queue is not None and not self._queue.empty():
+            _fail([self._queue.get_nowait()], RuntimeError("PII scrubber is shut down"))
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "mode": "process" if self.process_workers > 0 else "thread",
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "batches": self.batches,
+            "texts": self.texts,
+            "fast_path": self.fast_path,
+            "avg_batch_size": round(self.texts / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+def _resolve_workers(configured: int) -> int:
+    # -1 means "one per core"
+    if configured < 0:
+        return os.cpu_count() or 1
+    return configured
+
+
+pii_scrubber = PIIScrubber(
+    max_batch=settings.PII_BATCH_MAX_SIZE,
+    max_wait_ms=settings.PII_BATCH_MAX_WAIT_MS,
+    process_workers=_resolve_workers(settings.PII_PROCESS_WORKERS),
+)
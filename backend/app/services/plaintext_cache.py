@@ -0,0 +1,115 @@
+"""
+Bounded in-memory cache of decrypted fields for hot records.
+
+Keys are (table, row id, ciphertext digest): an entry can only ever be
+returned for the exact ciphertext it was decrypted from, so a row that
+was re-encrypted simply misses.  Writers still call invalidate() so
+stale plaintext does not linger in memory until its TTL runs out.
+
+Plaintext lives only in this process's memory and is never persisted
+or serialised.
+"""
+import hashlib
+import threading
+from typing import Dict, List, Optional, Sequence, Set, Tuple, Union
+
+from app.core.config import settings
+from app.core.security import decrypt_many
+from app.core.ttl_cache import TTLCache
+
+Token = Optional[Union[bytes, str]]
+CacheKey = Tuple[str, int, str]
+
+
+def _digest(token: Union[bytes, str]) -> str:
+    if isinstance(token, str):
+        token = token.encode("utf-8")
+    return hashlib.blake2b(token, digest_size=16).hexdigest()
+
+
+class PlaintextCache:
+    """LRU + TTL map of (table, row id, digest) -> plaintext."""
+
+    def __init__(self, max_entries: int, ttl: float) -> None:
+        self._entries: TTLCache[str] = TTLCache(max_entries, ttl, on_evict=self._unindex)
+        self._by_row: Dict[Tuple[str, int], Set[CacheKey]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _drop(self, key: CacheKey) -> None:
+        self._entries.pop(key)
+        self._unindex(key)
+
+    def _unindex(self, key: CacheKey) -> None:
+        keys = self._by_row.get(key[:2])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_row[key[:2]]
+
+    def _set(self, key: CacheKey, plain: str) -> None:
+        self._by_row.setdefault(key[:2], set()).add(key)
+        self._entries.set(key, plain)
+
+    async def decrypt(
+        self, table: str, items: Sequence[Tuple[int, Token]], strict: bool = True
+    ) -> List[Optional[str]]:
+        """
+        decrypt_many for fields of ``table`` rows, given as (row id, token)
+        pairs.  Hits skip the crypto; misses are decrypted in one batch.
+        """
+        results: List[Optional[str]] = [None] * len(items)
+        missing: List[int] = []
+        with self._lock:
+            for i, (row_id, token) in enumerate(items):
+                if not token:
+                    continue
+                plain = self._entries.get((table, row_id, _digest(token)))
+                if plain is None:
+                    missing.append(i)
+                else:
+                    results[i] = plain
+                    self.hits += 1
+            self.misses += len(missing)
+
+        if missing:
+            plains = await decrypt_many([items[i][1] for i in missing], strict=strict)
+            with self._lock:
+                for i, plain in zip(missing, plains):
+                    results[i] = plain
+                    if plain is not None:
+                        row_id, token = items[i]
+                        self._set((table, row_id, _digest(token)), plain)
+        return results
+
+    def invalidate(self, table: str, *row_ids: int) -> None:
+        """Forget every cached field of the given rows."""
+        with self._lock:
+            for row_id in row_ids:
+                for key in list(self._by_row.get((table, row_id), ())):
+                    self._drop(key)
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_row.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self._entries.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+plaintext_cache = PlaintextCache(
+    max_entries=settings.PLAINTEXT_CACHE_MAX_ENTRIES,
+    ttl=settings.PLAINTEXT_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,104 @@
+"""
+Drift repair for the per-task progress counters.
+
+tasks.steps_total and tasks.steps_completed are maintained in the same
+transaction as every step insert (StepWriter) and toggle
+(_set_steps_completed), so they should never drift.  This job is the
+safety net for anything that bypasses those paths (manual SQL, restored
+backups): it walks tasks in id order, recounts their micro_wins and
+fixes the rows that disagree, including is_completed.
+
+Repairs never credit streaks or total_completed; only real toggles do.
+Run it with ``python reconcile_progress.py`` or set
+PROGRESS_RECONCILE_INTERVAL_SECONDS to run it in the background.
+"""
+import asyncio
+import time
+from typing import Callable
+
+from sqlalchemy import and_, func, or_, select, update
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.task import MicroWinModel, Task
+from app.services.change_tracker import sidebar_versions
+
+_stats = {"runs": 0, "checked": 0, "repaired": 0, "last_run_seconds": 0.0}
+
+
+async def _reconcile_batch(db, after_id: int, batch_size: int):
+    """Recount one batch of tasks; returns (ids checked, repaired (id, user_id) rows)."""
+    # Lock the batch first: the recount below is a new statement, so it sees every
+    # step committed by a writer that held one of these rows before us.
+    ids = (await db.execute(
+        select(Task.id).where(Task.id > after_id).order_by(Task.id).limit(batch_size).with_for_update()
+    )).scalars().all()
+    if not ids:
+        return [], []
+
+    total = select(func.count()).where(MicroWinModel.task_id == Task.id).scalar_subquery()
+    done = (
+        select(func.count())
+        .where(MicroWinModel.task_id == Task.id, MicroWinModel.is_completed.is_(True))
+        .scalar_subquery()
+    )
+    # A task without steps (still streaming, or failed) is never completed
+    all_done = and_(total > 0, done >= total)
+    repaired = (await db.execute(
+        update(Task)
+        .where(
+            Task.id.in_(ids),
+            or_(
+                Task.steps_total.is_distinct_from(total),
+                Task.steps_completed.is_distinct_from(done),
+                Task.is_completed.is_distinct_from(all_done),
+            ),
+        )
+        .values(steps_total=total, steps_completed=done, is_completed=all_done)
+        .returning(Task.id, Task.user_id)
+        .execution_options(synchronize_session=False)
+    )).all()
+    return ids, repaired
+
+
+async def reconcile_progress(
+    session_factory: Callable = AsyncSessionLocal,
+    batch_size: int = settings.PROGRESS_RECONCILE_BATCH_SIZE,
+) -> dict:
+    """One full pass over all tasks, one short transaction per batch."""
+    t0 = time.perf_counter()
+    checked, repaired_ids = 0, []
+    after_id = 0
+    while True:
+        async with session_factory() as db:
+            ids, repaired = await _reconcile_batch(db, after_id, batch_size)
+            await db.commit()
+        if not ids:
+            break
+        checked += len(ids)
+        after_id = ids[-1]
+        repaired_ids += [row.id for row in repaired]
+        sidebar_versions.bump(*{row.user_id for row in repaired})
+    elapsed = time.perf_counter() - t0
+
+    _stats["runs"] += 1
+    _stats["checked"] += checked
+    _stats["repaired"] += len(repaired_ids)
+    _stats["last_run_seconds"] = round(elapsed, 3)
+    if repaired_ids:
+        print(f"Progress reconciliation repaired {len(repaired_ids)} task(s): {repaired_ids[:20]}")
+    return {"checked": checked, "repaired": len(repaired_ids), "seconds": round(elapsed, 3)}
+
+
+async def run_periodically(interval: float) -> None:
+    """Background loop started by the lifespan when PROGRESS_RECONCILE_INTERVAL_SECONDS > 0."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await reconcile_progress()
+        except Exception as e:
+            print(f"Progress reconciliation failed: {e}")
+
+
+def stats() -> dict:
+    return dict(_stats)
@@ -0,0 +1,120 @@
+"""
+Single-flight coalescing of identical upstream streams.
+
+The first request for a prompt hash starts the upstream stream in a
+background task; every concurrent request with the same hash subscribes
+to the same chunks.  Late joiners replay what was already received, then
+follow live.  Each subscriber does its own parsing, DB writes and latency
+reporting — only the model call is shared.  Items are passed through
+as-is, so status markers from the upstream factory (admission's Queued)
+reach every subscriber along with the text.
+"""
+import asyncio
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+
+class _Flight:
+    """One in-progress upstream stream and its received chunks."""
+
+    def __init__(self) -> None:
+        self.chunks: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._waiter = asyncio.Event()
+
+    def notify(self) -> None:
+        waiter, self._waiter = self._waiter, asyncio.Event()
+        waiter.set()
+
+    @property
+    def waiter(self) -> asyncio.Event:
+        return self._waiter
+
+
+class SingleFlight:
+    """Share one upstream stream between concurrent identical requests."""
+
+    def __init__(self) -> None:
+        self._flights: Dict[str, _Flight] = {}
+        self.upstream_started = 0  # Streams actually opened upstream
+        self.coalesced = 0         # Requests that joined an existing stream
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def stream(
+        self,
+        key: str,
+        factory: Callable[[], AsyncIterator[Any]],
+        on_coalesce: Optional[Callable[[], None]] = None,
+    ) -> AsyncIterator[Any]:
+        """
+        Yield the chunks of the upstream stream for ``key``, starting it if needed.
+        ``on_coalesce`` runs when an existing stream is joined instead.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight()
+            self._flights[key] = flight
+            flight.task = asyncio.create_task(self._run(key, flight, factory))
+            self.upstream_started += 1
+        else:
+            self.coalesced += 1
+            if on_coalesce is not None:
+                on_coalesce()
+        flight.subscribers += 1
+
+        index = 0
+        try:
+            while True:
+                waiter = flight.waiter
+                if index < len(flight.chunks):
+                    chunk = flight.chunks[index]
+                    index += 1
+                    yield chunk
+                    continue
+                if flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                await waiter.wait()
+        finally:
+            flight.subscribers -= 1
+            # Nobody is listening any more: stop paying for the upstream stream
+            if flight.subscribers == 0 and not flight.done:
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    async def _run(self, key: str, flight: _Flight, factory: Callable[[], AsyncIterator[Any]]) -> None:
+        try:
+            # aclosing: a cancelled flight still runs the stream's cleanup (admission slot, upstream)
+            async with aclosing(factory()) as upstream:
+                async for chunk in upstream:
+                    flight.chunks.append(chunk)
+                    flight.notify()
+        except asyncio.CancelledError:
+            flight.error = RuntimeError("Upstream stream cancelled")
+        except Exception as e:
+            flight.error = e
+        finally:
+            flight.done = True
+            self._forget(key, flight)
+            flight.notify()
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "upstream_started": self.upstream_started,
+            "coalesced": self.coalesced,
+        }
+
+
+single_flight = SingleFlight()
@@ -0,0 +1,147 @@
+"""
+Write-behind buffer for streamed micro-wins.
+
+stream_micro_wins sends each step to the client as soon as it is
+parsed, but only buffers the row here.  Buffered steps and the title
+are written together — one multi-row INSERT, one UPDATE of the task's
+title and steps_total counter, one commit —
+at stream end, or earlier once STEP_WRITE_MAX_PENDING steps or
+STEP_WRITE_MAX_DELAY_SECONDS have piled up.
+
+Each write runs as its own shielded task on a short-lived session, so a
+client disconnect (which cancels the response) cannot interrupt it, and
+close() persists whatever was still buffered.  Rows leave the buffer
+only once their write has committed; a failed write is retried once,
+then StepWriteError is raised and the rows stay buffered for close().
+"""
+import asyncio
+import time
+from typing import Callable, List, Optional, Set
+
+from sqlalchemy import insert, update
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.task import MicroWinModel, Task
+from app.services.change_tracker import sidebar_versions
+
+# Strong refs so in-flight writes are not garbage-collected mid-way
+_in_flight: Set[asyncio.Task] = set()
+_stats = {"flushes": 0, "rows": 0, "retries": 0, "failed": 0}
+
+
+class StepWriteError(Exception):
+    """Buffered steps could not be persisted (after one retry)."""
+
+
+class StepWriter:
+    def __init__(
+        self,
+        task_id: int,
+        user_id: Optional[int] = None,
+        session_factory: Callable = AsyncSessionLocal,
+        max_pending: int = settings.STEP_WRITE_MAX_PENDING,
+        max_delay: float = settings.STEP_WRITE_MAX_DELAY_SECONDS,
+    ) -> None:
+        self.task_id = task_id
+        self.user_id = user_id
+        self._session_factory = session_factory
+        self._max_pending = max_pending
+        self._max_delay = max_delay
+        self._steps: List[dict] = []
+        self._title: Optional[str] = None
+        self._oldest: Optional[float] = None
+        self._writing: Optional[asyncio.Task] = None
+
+    def add_step(self, step_order: int, encrypted_action: bytes) -> None:
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+        self._steps.append({
+            "task_id": self.task_id,
+            "encrypted_action": encrypted_action,
+            "is_completed": False,
+            "step_order": step_order,
+        })
+
+    def set_title(self, title: str) -> None:
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+        self._title = title
+
+    @property
+    def due(self) -> bool:
+        """True once the buffer has hit its size or age threshold."""
+        if self._oldest is None:
+            return False
+        return len(self._steps) >= self._max_pending or time.monotonic() - self._oldest >= self._max_delay
+
+    async def flush(self) -> None:
+        """Write everything buffered so far in one transaction; raises StepWriteError."""
+        if not self._steps and self._title is None and (self._writing is None or self._writing.done()):
+            return
+        # Spawned before the first await, so a cancellation (client gone) can no
+        # longer lose the buffer; chained after any write still in flight
+        task = asyncio.ensure_future(self._write(self._writing))
+        self._writing = task
+        _in_flight.add(task)
+        task.add_done_callback(_in_flight.discard)
+        # Cancelling the stream must not cancel a half-done write
+        await asyncio.shield(task)
+
+    async def _write(self, previous: Optional[asyncio.Task]) -> None:
+        if previous is not None:
+            # A write the disconnect interrupted may still be running: let it land first
+            await asyncio.gather(previous, return_exceptions=True)
+        # Taken only now, so rows the previous write committed are not written twice
+        steps, title = self._steps[:], self._title
+        if not steps and title is None:
+            return
+        try:
+            try:
+                await self._write_once(steps, title)
+            except Exception:
+                _stats["retries"] += 1
+                await self._write_once(steps, title)
+        except Exception as e:
+            _stats["failed"] += 1
+            raise StepWriteError(f"Step write for Task {self.task_id} failed: {e}") from e
+        # Committed: only now do the rows leave the buffer
+        del self._steps[:len(steps)]
+        if self._title == title:
+            self._title = None
+        if not self._steps:
+            self._oldest = None
+        sidebar_versions.bump(self.user_id)
+        _stats["flushes"] += 1
+        _stats["rows"] += len(steps)
+
+    async def _write_once(self, steps: List[dict], title: Optional[str]) -> None:
+        async with self._session_factory() as db:
+            if steps:
+                await db.execute(insert(MicroWinModel), steps)
+            values = {}
+            if steps:
+                # Same transaction as the INSERT, so the counter never drifts from the rows
+                values["steps_total"] = Task.steps_total + len(steps)
+                values["is_completed"] = False
+            if title is not None:
+                values["title"] = title
+            await db.execute(update(Task).where(Task.id == self.task_id).values(**values))
+            await db.commit()
+
+    async def close(self) -> None:
+        """Persist anything still buffered (e.g. after a client disconnect)."""
+        try:
+            await self.flush()
+        except StepWriteError as e:
+            print(e)
+
+
+async def drain() -> None:
+    """Wait for in-flight writes; called on shutdown."""
+    if _in_flight:
+        await asyncio.gather(*list(_in_flight), return_exceptions=True)
+
+
+def stats() -> dict:
+    return {**_stats, "in_flight": len(_in_flight)}
@@ -0,0 +1,105 @@
+"""
+Incremental JSON-lines parser for the Gemini stream.
+
+The model is asked for one JSON object per line, but chunks arrive at
+arbitrary boundaries and sometimes wrapped in markdown code fences.
+The parser keeps only the object that is currently open, tracks brace
+depth and string/escape state, and hands back every object the moment
+its closing brace arrives.  Each character is inspected at most once,
+so the cost per chunk depends on the chunk, not on the stream length.
+"""
+import json
+import re
+from typing import List, Optional
+
+# Characters that change parser state outside / inside a JSON string
+_STRUCTURE_RE = re.compile(r'[{}"]')
+_STRING_RE = re.compile(r'["\\]')
+
+
+class JSONLinesParser:
+    """Feed it text chunks, get back complete JSON objects (dicts)."""
+
+    def __init__(self) -> None:
+        self._parts: List[str] = []  # Pieces of the object currently open
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def pending(self) -> bool:
+        """True while an object has been opened but not yet closed."""
+        return self._depth > 0
+
+    def feed(self, chunk: str) -> List[dict]:
+        """Consume one chunk and return the objects it completed, in order."""
+        objects: List[dict] = []
+        pos = 0
+        end = len(chunk)
+        start = 0 if self._depth else None
+
+        while pos < end:
+            # ─── Between objects: skip fences, whitespace and chatter ───
+            if self._depth == 0:
+                brace = chunk.find("{", pos)
+                if brace == -1:
+                    break
+                start = brace
+                self._depth = 1
+                pos = brace + 1
+                continue
+
+            # ─── Inside a string: only quotes and backslashes matter ───
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    pos += 1
+                    continue
+                match = _STRING_RE.search(chunk, pos)
+                if match is None:
+                    break
+                pos = match.end()
+                if match.group() == "\\":
+                    self._escape = True
+                else:
+                    self._in_string = False
+                continue
+
+            # ─── Inside an object, outside strings ───
+            match = _STRUCTURE_RE.search(chunk, pos)
+            if match is None:
+                break
+            pos = match.end()
+            char = match.group()
+            if char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._parts.append(chunk[start:pos])
+                    obj = self._decode("".join(self._parts))
+                    self._parts = []
+                    start = None
+                    if obj is not None:
+                        objects.append(obj)
+
+        if self._depth and start is not None:
+            self._parts.append(chunk[start:])
+        return objects
+
+    def reset(self) -> None:
+        """Drop any half-received object."""
+        self._parts = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @staticmethod
+    def _decode(raw: str) -> Optional[dict]:
+        try:
+            obj = json.loads(raw)
+        except json.JSONDecodeError:
+            return None
+        return obj if isinstance(obj, dict) else None
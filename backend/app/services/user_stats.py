@@ -0,0 +1,255 @@
+"""
+Gamification stats: daily rollup writes and the cached leaderboard.
+
+Completions are rolled up per user and day in daily_completions, in the
+same transaction as the step toggle that caused them (record_daily), so
+history and weekly activity are a primary-key range read and never
+touch micro_wins.
+
+The leaderboard is a periodically refreshed snapshot: the top
+LEADERBOARD_TOP_N users plus the score distribution (users per
+total_completed value) of the top LEADERBOARD_RANKED_USERS, both read
+off ix_users_total_completed_id with a LIMIT, so a refresh never scans
+the whole users table.  Any user's rank and percentile is then a binary
+search over the snapshot, at most LEADERBOARD_CACHE_TTL_SECONDS stale.
+Users below that window all share the rank after it and get a 0.0
+percentile (a lower bound); the user count behind the percentiles is
+the planner's estimate on Postgres.
+
+Leaderboard entries never carry a user id or name: each user shows up
+under a stable handle keyed on LEADERBOARD_HANDLE_KEY, and only the
+viewer's own row is marked (is_you).
+"""
+import asyncio
+import bisect
+import hashlib
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, dialect_insert
+from app.models.stats import DailyCompletion
+from app.models.user import User
+
+
+# ─── Rollup writes ────────────────────────────────────────────
+async def record_daily(db: AsyncSession, day: date, counts: Dict[int, Tuple[int, int]]) -> None:
+    """
+    Add {user_id: (tasks_completed, steps_completed)} to ``day``'s rollup rows.
+    One upsert for all users; runs inside the caller's transaction.
+    """
+    rows = [
+        {"user_id": user_id, "day": day, "tasks_completed": tasks, "steps_completed": steps}
+        for user_id, (tasks, steps) in counts.items()
+        if tasks or steps
+    ]
+    if not rows:
+        return
+    stmt = dialect_insert()(DailyCompletion)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[DailyCompletion.user_id, DailyCompletion.day],
+            set_={
+                "tasks_completed": DailyCompletion.tasks_completed + stmt.excluded.tasks_completed,
+                "steps_completed": DailyCompletion.steps_completed + stmt.excluded.steps_completed,
+            },
+        ),
+        rows,
+    )
+
+
+async def daily_history(db: AsyncSession, user_id: int, days: int, today: Optional[date] = None) -> List[dict]:
+    """The last ``days`` days for ``user_id``, oldest first, zero-filled."""
+    today = today or date.today()
+    start = today - timedelta(days=days - 1)
+    rows = (await db.execute(
+        select(DailyCompletion.day, DailyCompletion.tasks_completed, DailyCompletion.steps_completed)
+        .where(DailyCompletion.user_id == user_id, DailyCompletion.day >= start, DailyCompletion.day <= today)
+    )).all()
+    by_day = {row.day: row for row in rows}
+    history = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        row = by_day.get(day)
+        history.append({
+            "day": day.isoformat(),
+            "tasks_completed": row.tasks_completed if row else 0,
+            "steps_completed": max(0, row.steps_completed) if row else 0,
+        })
+    return history
+
+
+def current_streak(streak_count: Optional[int], last_completion_date: Optional[date], today: Optional[date] = None) -> int:
+    """The stored streak only counts while it can still be extended (completed today or yesterday)."""
+    today = today or date.today()
+    if not streak_count or last_completion_date is None or last_completion_date < today - timedelta(days=1):
+        return 0
+    return streak_count
+
+
+# ─── Leaderboard ──────────────────────────────────────────────
+async def _count_users(db: AsyncSession) -> int:
+    """Number of users: the planner's row estimate on Postgres (no scan), an exact count elsewhere."""
+    if db.bind.dialect.name == "postgresql":
+        estimate = (await db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'users'::regclass")
+        )).scalar()
+        # -1 until the table has been vacuumed or analyzed once
+        if estimate is not None and estimate >= 0:
+            return int(estimate)
+    return (await db.execute(select(func.count()).select_from(User))).scalar() or 0
+
+
+def display_handle(user_id: int) -> str:
+    """Stable public handle for ``user_id``; keyed, so ids can't be recovered by hashing 1..N."""
+    digest = hashlib.blake2b(
+        str(user_id).encode("utf-8"), key=settings.LEADERBOARD_HANDLE_KEY.encode("utf-8")[:64], digest_size=4
+    )
+    return f"Player {digest.hexdigest()}"
+
+
+@dataclass
+class _Snapshot:
+    top: List[dict]
+    scores: List[int] = field(default_factory=list)       # distinct total_completed in the window, ascending
+    below: List[int] = field(default_factory=list)        # users with a lower score than scores[i]
+    outside: int = 0                                      # users below the window
+    floor: int = 1                                        # lower scores are outside the window
+    total_users: int = 0
+    computed_at: float = 0.0
+
+
+class Leaderboard:
+    def __init__(
+        self, ttl: float, top_n: int, ranked_users: int, session_factory: Callable = AsyncSessionLocal
+    ) -> None:
+        self._ttl = ttl
+        self.top_n = top_n
+        self.ranked_users = max(ranked_users, top_n)
+        self._session_factory = session_factory
+        self._snapshot: Optional[_Snapshot] = None
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.refreshes = 0
+        self.last_refresh_ms = 0.0
+
+    async def snapshot(self) -> _Snapshot:
+        snap = self._snapshot
+        if snap is not None and time.time() - snap.computed_at < self._ttl:
+            self.hits += 1
+            return snap
+        async with self._lock:
+            # Another request may have refreshed while we waited
+            snap = self._snapshot
+            if snap is not None and time.time() - snap.computed_at < self._ttl:
+                self.hits += 1
+                return snap
+            self._snapshot = await self._load()
+            return self._snapshot
+
+    async def _load(self) -> _Snapshot:
+        t0 = time.perf_counter()
+        async with self._session_factory() as db:
+            top = (await db.execute(
+                select(User.id, User.total_completed, User.streak_count, User.last_completion_date)
+                .where(User.total_completed > 0)
+                .order_by(User.total_completed.desc(), User.id)
+                .limit(self.top_n)
+            )).all()
+            window = (
+                select(User.total_completed.label("score"))
+                .where(User.total_completed > 0)
+                .order_by(User.total_completed.desc(), User.id)
+                .limit(self.ranked_users)
+                .subquery()
+            )
+            distribution = (await db.execute(
+                select(window.c.score, func.count().label("users")).group_by(window.c.score).order_by(window.c.score)
+            )).all()
+            total_users = await _count_users(db)
+
+        snap = _Snapshot(top=[], computed_at=time.time())
+        ranked = sum(row.users for row in distribution)
+        if ranked >= self.ranked_users and distribution:
+            # The LIMIT may have cut the lowest score in half: keep only complete scores
+            snap.floor = distribution[0].score + 1
+            ranked -= distribution[0].users
+            distribution = distribution[1:]
+        # The estimate may lag behind the rows just counted
+        snap.total_users = max(total_users, ranked)
+        snap.outside = snap.total_users - ranked
+        below = snap.outside
+        for row in distribution:
+            snap.scores.append(row.score)
+            snap.below.append(below)
+            below += row.users
+        today = date.today()
+        for row in top:
+            rank, _ = self._position(snap, row.total_completed)
+            snap.top.append({
+                "rank": rank,
+                "user_id": row.id,  # Internal only, see top()
+                "display_name": display_handle(row.id),
+                "total_completed": row.total_completed,
+                "streak_count": current_streak(row.streak_count, row.last_completion_date, today),
+            })
+
+        self.refreshes += 1
+        self.last_refresh_ms = round((time.perf_counter() - t0) * 1000, 1)
+        return snap
+
+    @staticmethod
+    def _position(snap: _Snapshot, score: int) -> Tuple[int, float]:
+        """(rank, percentile) for ``score``; ties share a rank."""
+        if not snap.total_users:
+            return 1, 100.0
+        if score < snap.floor:
+            # Below the window: everyone in it is ahead, nobody is known to be behind
+            return snap.total_users - snap.outside + 1, 0.0
+        i = bisect.bisect_left(snap.scores, score)
+        below = snap.below[i] if i < len(snap.scores) else snap.total_users
+        # Users strictly above: everyone from the next higher score up
+        j = bisect.bisect_right(snap.scores, score)
+        above = snap.total_users - (snap.below[j] if j < len(snap.scores) else snap.total_users)
+        return above + 1, round(100.0 * below / snap.total_users, 1)
+
+    async def top(self, limit: int, viewer_id: Optional[int] = None) -> dict:
+        snap = await self.snapshot()
+        entries = []
+        for entry in snap.top[:limit]:
+            public = {k: v for k, v in entry.items() if k != "user_id"}
+            public["is_you"] = entry["user_id"] == viewer_id
+            entries.append(public)
+        return {
+            "entries": entries,
+            "total_users": snap.total_users,
+            "as_of": snap.computed_at,
+        }
+
+    async def position(self, score: Optional[int]) -> dict:
+        snap = await self.snapshot()
+        rank, percentile = self._position(snap, score or 0)
+        return {"rank": rank, "percentile": percentile, "total_users": snap.total_users, "as_of": snap.computed_at}
+
+    def stats(self) -> dict:
+        snap = self._snapshot
+        return {
+            "hits": self.hits,
+            "refreshes": self.refreshes,
+            "last_refresh_ms": self.last_refresh_ms,
+            "total_users": snap.total_users if snap else 0,
+            "distinct_scores": len(snap.scores) if snap else 0,
+            "outside_window": snap.outside if snap else 0,
+        }
+
+
+leaderboard = Leaderboard(
+    ttl=settings.LEADERBOARD_CACHE_TTL_SECONDS,
+    top_n=settings.LEADERBOARD_TOP_N,
+    ranked_users=settings.LEADERBOARD_RANKED_USERS,
+)
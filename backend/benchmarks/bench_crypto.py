@@ -0,0 +1,64 @@
+"""
+Benchmark: event-loop stall while decrypting a user's history,
+decrypt_data one field at a time vs decrypt_many.
+
+A heartbeat coroutine wakes every 1 ms and records how late it was; the
+worst lateness is the longest time the loop could not serve any other
+request.  Run from backend/: python benchmarks/bench_crypto.py
+(needs cryptography, pydantic-settings and aiosqlite for the app imports)
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cryptography.fernet import Fernet
+
+# Settings are read at import time
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("DB_ENCRYPTION_KEY", Fernet.generate_key().decode())
+
+from app.core.config import settings
+from app.core.security import decrypt_data, decrypt_many, encrypt_data
+
+TICK = 0.001
+
+
+async def heartbeat(stop: asyncio.Event, lags: list) -> None:
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - t0 - TICK)
+
+
+async def sequential(tokens):
+    # What the read endpoints used to do: one field at a time on the loop
+    return [decrypt_data(token) for token in tokens]
+
+
+async def measure(fn, tokens) -> tuple:
+    stop, lags = asyncio.Event(), []
+    beat = asyncio.create_task(heartbeat(stop, lags))
+    await asyncio.sleep(TICK * 3)
+    t0 = time.perf_counter()
+    await fn(tokens)
+    wall = time.perf_counter() - t0
+    stop.set()
+    await beat
+    return wall * 1000, max(lags) * 1000
+
+
+async def main() -> None:
+    print(f"inline up to {settings.CRYPTO_INLINE_MAX} tokens, {settings.CRYPTO_POOL_WORKERS} pool workers\n")
+    print(f"{'tokens':>7} {'mode':<12} {'wall ms':>9} {'max stall ms':>13}")
+    for n in (10, 100, 1000, 5000, 20000):
+        tokens = [encrypt_data(f"Step {i}: put the blue folder back on the shelf") for i in range(n)]
+        for name, fn in (("sequential", sequential), ("decrypt_many", decrypt_many)):
+            wall, stall = await measure(fn, tokens)
+            print(f"{n:>7} {name:<12} {wall:>9.1f} {stall:>13.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
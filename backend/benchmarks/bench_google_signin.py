@@ -0,0 +1,142 @@
+"""
+Benchmark: Google sign-in against a local stub userinfo server.
+
+Starts a stub of Google's userinfo endpoint and the real app in-process
+(SQLite, GOOGLE_USERINFO_URL pointed at the stub), then drives
+POST /api/v1/auth/google/verify-token:
+
+  first    one call per fresh access token (new users -> upsert insert)
+  repeat   the same tokens again (userinfo cache hits, upsert update)
+
+It reports latency percentiles per phase, how many TCP connections the
+stub saw (keep-alive reuse) and how many userinfo calls reached it.
+
+Needs uvicorn, httpx, aiosqlite.  Run from backend/:
+    python benchmarks/bench_google_signin.py --logins 200 --concurrency 20
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--stub-port", type=int, default=8767)
+    parser.add_argument("--stub-latency-ms", type=int, default=30, help="simulated Google response time")
+    return parser.parse_args()
+
+
+def configure_env(args: argparse.Namespace) -> None:
+    """Settings are read at import time, so this must run before importing app.*"""
+    from cryptography.fernet import Fernet
+
+    path = os.path.join(tempfile.mkdtemp(prefix="microwin-bench-"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+    os.environ.setdefault("DB_ENCRYPTION_KEY", Fernet.generate_key().decode())
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["GOOGLE_USERINFO_URL"] = f"http://127.0.0.1:{args.stub_port}/oauth2/v2/userinfo"
+
+
+# ─── Stub Google ──────────────────────────────────────────────
+def build_stub(latency_ms: int):
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse
+
+    stub = FastAPI()
+    stub.state.calls = 0
+    stub.state.connections = set()
+
+    @stub.get("/oauth2/v2/userinfo")
+    async def userinfo(request: Request):
+        stub.state.calls += 1
+        stub.state.connections.add((request.client.host, request.client.port))
+        await asyncio.sleep(latency_ms / 1000)
+        token = request.headers.get("authorization", "").removeprefix("Bearer ")
+        if not token.startswith("tok-"):
+            return JSONResponse({"error": "invalid_token"}, status_code=401)
+        n = token[4:]
+        return {"id": f"google-{n}", "email": f"signin{n}@example.com", "name": f"Bench User {n}"}
+
+    return stub
+
+
+def pct(values: list, p: float) -> float:
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 1) if ordered else 0.0
+
+
+async def drive(client, tokens: list, concurrency: int) -> dict:
+    latencies, errors = [], 0
+    queue = iter(tokens)
+
+    async def worker():
+        nonlocal errors
+        for token in queue:
+            t0 = time.perf_counter()
+            resp = await client.post("/auth/google/verify-token", json={"access_token": token})
+            if resp.status_code != 200:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - t0
+    return {
+        "ok": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / wall, 1) if wall else 0.0,
+        "p50_ms": pct(latencies, 0.50),
+        "p95_ms": pct(latencies, 0.95),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    import httpx
+    import uvicorn
+
+    from main import app
+    from app.db.migrations import run_migrations
+    from app.db.session import engine
+    from app.services.google_auth import google_verifier
+
+    await run_migrations(engine)
+
+    stub = build_stub(args.stub_latency_ms)
+    servers = [
+        uvicorn.Server(uvicorn.Config(stub, port=args.stub_port, log_level="warning")),
+        uvicorn.Server(uvicorn.Config(app, port=args.port, log_level="warning", lifespan="on")),
+    ]
+    tasks = [asyncio.ensure_future(s.serve()) for s in servers]
+    while not all(s.started for s in servers):
+        await asyncio.sleep(0.05)
+
+    tokens = [f"tok-{i}" for i in range(args.logins)]
+    base = f"http://127.0.0.1:{args.port}/api/v1"
+    async with httpx.AsyncClient(base_url=base, timeout=30) as client:
+        for phase in ("first", "repeat"):
+            calls_before = stub.state.calls
+            result = await drive(client, tokens, args.concurrency)
+            result["upstream_calls"] = stub.state.calls - calls_before
+            print(f"{phase:<7} {result}")
+
+    print(f"\nstub saw {len(stub.state.connections)} TCP connection(s) for {stub.state.calls} userinfo calls")
+    print(f"userinfo cache: {google_verifier.stats()}")
+
+    for s in reversed(servers):
+        s.should_exit = True
+    await asyncio.gather(*tasks)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    configure_env(args)
+    asyncio.run(main(args))
@@ -0,0 +1,78 @@
+"""
+Benchmark: event-loop stall during a burst of logins.
+
+Compares bcrypt verification called directly on the loop (the old
+user.py path) with the dedicated password_hasher pool.  A heartbeat
+coroutine stands in for SSE streams: its worst lateness is how long a
+stream would have frozen.  Rejections show the 503 backpressure.
+
+Run from backend/: python benchmarks/bench_login_storm.py --logins 40
+(needs passlib[bcrypt], cryptography, pydantic-settings and aiosqlite)
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cryptography.fernet import Fernet
+
+# Settings are read at import time
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("DB_ENCRYPTION_KEY", Fernet.generate_key().decode())
+
+from fastapi import HTTPException
+
+from app.core.security import hash_password, verify_password
+from app.services.password_hasher import password_hasher
+
+TICK = 0.005
+
+
+async def heartbeat(stop: asyncio.Event, lags: list) -> None:
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - t0 - TICK)
+
+
+async def inline_login(hashed: str) -> None:
+    verify_password("correct horse battery", hashed)
+
+
+async def pooled_login(hashed: str) -> None:
+    await password_hasher.verify("correct horse battery", hashed)
+
+
+async def storm(fn, hashed: str, logins: int) -> dict:
+    stop, lags = asyncio.Event(), []
+    beat = asyncio.create_task(heartbeat(stop, lags))
+    await asyncio.sleep(TICK * 2)
+    t0 = time.perf_counter()
+    results = await asyncio.gather(*(fn(hashed) for _ in range(logins)), return_exceptions=True)
+    wall = time.perf_counter() - t0
+    stop.set()
+    await beat
+    return {
+        "wall_s": round(wall, 2),
+        "max_stall_ms": round(max(lags) * 1000, 1),
+        "rejected_503": sum(isinstance(r, HTTPException) and r.status_code == 503 for r in results),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    hashed = hash_password("correct horse battery")
+    print(f"{args.logins} concurrent logins, pool: {password_hasher.workers} workers, "
+          f"queue max {password_hasher.max_pending}\n")
+    for name, fn in (("inline", inline_login), ("pooled", pooled_login)):
+        print(f"{name:<7} {await storm(fn, hashed, args.logins)}")
+    print(f"\npool stats: {password_hasher.stats()}")
+    password_hasher.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--logins", type=int, default=40)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,73 @@
+"""
+Benchmark: masking cost on long instructions, legacy str.replace loop vs
+single-pass span masking, plus the regex fast path that skips spaCy.
+
+Entity spans are synthesised (no spaCy model needed) so only the masking
+step is measured.  Run from backend/: python benchmarks/bench_pii_masking.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.pii_masking import mask_spans, needs_ner, pattern_spans, repeat_spans
+
+NAMES = ["Anna", "Annabel", "Berlin", "Acme Corp", "Jordan", "Lagos", "Priya", "Globex"]
+FILLER = ["need", "to", "finish", "the", "report", "before", "friday", "and", "call", "about", "it"]
+LABELS = {"Anna": "PERSON", "Annabel": "PERSON", "Berlin": "GPE", "Acme Corp": "ORG",
+          "Jordan": "PERSON", "Lagos": "GPE", "Priya": "PERSON", "Globex": "ORG"}
+
+
+def make_instruction(words: int, rng: random.Random):
+    """Text plus the entity spans a NER model would return for it."""
+    parts, spans, pos = [], [], 0
+    for _ in range(words):
+        if rng.random() < 0.1:
+            word = rng.choice(NAMES)
+            spans.append((pos, pos + len(word), LABELS[word]))
+        else:
+            word = rng.choice(FILLER)
+        parts.append(word)
+        pos += len(word) + 1
+    return " ".join(parts), spans
+
+
+def legacy(text: str, spans) -> str:
+    scrubbed_text = text
+    for start, end, label in spans:
+        scrubbed_text = scrubbed_text.replace(text[start:end], f"[{label}]")
+    return scrubbed_text
+
+
+def span_based(text: str, spans) -> str:
+    return mask_spans(text, spans + repeat_spans(text, spans) + pattern_spans(text, ["EMAIL", "PHONE", "URL"]))
+
+
+def best_us(fn, *args, repeat: int = 20) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1e6
+
+
+if __name__ == "__main__":
+    rng = random.Random(0)
+    print(f"{'words':>7} {'entities':>9} {'legacy us':>11} {'span us':>9} {'outputs differ':>15}")
+    for words in (50, 500, 5000, 20000):
+        text, spans = make_instruction(words, rng)
+        # Legacy replaces "Anna" inside "Annabel" whenever Anna is seen first
+        differ = legacy(text, spans) != span_based(text, spans)
+        print(
+            f"{words:>7} {len(spans):>9} {best_us(legacy, text, spans):>11.1f} "
+            f"{best_us(span_based, text, spans):>9.1f} {str(differ):>15}"
+        )
+
+    print("\nFast path (skip spaCy) decision cost:")
+    for text in ("a.b@example.com +44 20 7946 0958", "email john smith about the trip",
+                 "I'm meeting Priya in Berlin"):
+        skip = not needs_ner(text, ["PERSON", "GPE", "ORG"])
+        print(f"  {best_us(needs_ner, text, ['PERSON', 'GPE', 'ORG'], repeat=200):6.2f} us  skip_spacy={skip!s:<5}  {text!r}")
@@ -0,0 +1,345 @@
+"""
+End-to-end load and latency benchmark for the MicroWin API.
+
+Boots the real app in-process under uvicorn on a local port, backed by
+SQLite (default) or any DATABASE_URL you pass, with the offline fake LLM
+provider.  Then it drives each scenario at a fixed concurrency:
+
+  decompose   POST /api/v1/tasks/decompose/stream   (SSE, TTFT measured)
+  list        GET  /api/v1/tasks/?include_steps=true   (one page, authenticated)
+  details     GET  /api/v1/tasks/{task_id}
+  complete    PATCH /api/v1/tasks/microwins/{step_id}
+
+For every scenario it reports TTFT (decompose only), total latency
+p50/p95/p99, throughput, error count and DB pool saturation (checked-out
+connections sampled every 5 ms).  Results are written as JSON; pass
+--compare to diff against a previous run and exit non-zero on regressions.
+
+Needs uvicorn, httpx and (for the default DB) aiosqlite.
+Run from backend/:
+    python benchmarks/bench_pipeline.py --concurrency 50 --requests 200 --out bench.json
+    python benchmarks/bench_pipeline.py --compare bench.json
+
+Streams must not pin DB connections: 200 concurrent decompositions
+should run on a 10-connection pool without errors or pool timeouts:
+    python benchmarks/bench_pipeline.py --scenarios decompose --concurrency 200 \
+        --requests 200 --users 200 --pool-size 10 --max-overflow 0
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# ─── CLI ──────────────────────────────────────────────────────
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=100, help="requests per scenario")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--scenarios", default="decompose,list,details,complete")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pool-size", type=int, default=None, help="DB_POOL_SIZE for the app")
+    parser.add_argument("--max-overflow", type=int, default=None, help="DB_MAX_OVERFLOW for the app")
+    parser.add_argument("--ttft-ms", type=int, default=200, help="fake LLM time to first token")
+    parser.add_argument("--chunk-delay-ms", type=int, default=15, help="fake LLM delay between chunks")
+    parser.add_argument("--cache", action="store_true", help="keep the decomposition cache on")
+    parser.add_argument("--out", default=None, help="write JSON results here")
+    parser.add_argument("--compare", default=None, help="previous JSON results to diff against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression")
+    return parser.parse_args()
+
+
+def configure_env(args: argparse.Namespace) -> None:
+    """Settings are read at import time, so this must run before importing app.*"""
+    from cryptography.fernet import Fernet
+
+    if args.database_url is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="microwin-bench-"), "bench.db")
+        args.database_url = f"sqlite+aiosqlite:///{path}"
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("DB_ENCRYPTION_KEY", Fernet.generate_key().decode())
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["FAKE_LLM_TTFT_MS"] = str(args.ttft_ms)
+    os.environ["FAKE_LLM_CHUNK_DELAY_MS"] = str(args.chunk_delay_ms)
+    os.environ["DECOMPOSE_CACHE_BACKEND"] = "memory" if args.cache else "none"
+    if args.pool_size is not None:
+        os.environ["DB_POOL_SIZE"] = str(args.pool_size)
+    if args.max_overflow is not None:
+        os.environ["DB_MAX_OVERFLOW"] = str(args.max_overflow)
+    # Measure the pipeline, not the limiter
+    os.environ.setdefault("USER_RATE_BURST", "1000000")
+    os.environ.setdefault("LLM_MAX_CONCURRENT_STREAMS", str(max(args.concurrency, 1)))
+    os.environ.setdefault("LLM_QUEUE_MAX", str(args.requests))
+
+
+# ─── Measurement ──────────────────────────────────────────────
+def percentile(values: list, p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    # Nearest-rank percentile
+    index = min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(name: str, latencies: list, ttfts: list, errors: int, wall: float, pool: dict) -> dict:
+    ok = len(latencies)
+    result = {
+        "scenario": name,
+        "requests": ok + errors,
+        "errors": errors,
+        "throughput_rps": round(ok / wall, 2) if wall else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+        },
+        "db_pool": pool,
+    }
+    if ttfts:
+        result["ttft_ms"] = {
+            "p50": round(percentile(ttfts, 50), 2),
+            "p95": round(percentile(ttfts, 95), 2),
+            "p99": round(percentile(ttfts, 99), 2),
+        }
+    return result
+
+
+class PoolSampler:
+    """Samples checked-out connections while a scenario runs."""
+
+    def __init__(self, engine) -> None:
+        self._pool = engine.sync_engine.pool
+        self._samples: list = []
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            checkedout = getattr(self._pool, "checkedout", None)
+            self._samples.append(checkedout() if checkedout else 0)
+            await asyncio.sleep(0.005)
+
+    def __enter__(self) -> "PoolSampler":
+        self._task = asyncio.ensure_future(self._run())
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._task.cancel()
+
+    def result(self) -> dict:
+        size = getattr(self._pool, "size", lambda: None)()
+        overflow = getattr(self._pool, "_max_overflow", 0) or 0
+        capacity = size + overflow if size is not None else None
+        peak = max(self._samples, default=0)
+        return {
+            "capacity": capacity,
+            "peak_checked_out": peak,
+            "mean_checked_out": round(statistics.fmean(self._samples), 2) if self._samples else 0.0,
+            "saturated_share": (
+                round(sum(1 for s in self._samples if capacity and s >= capacity) / len(self._samples), 3)
+                if self._samples else 0.0
+            ),
+        }
+
+
+async def run_scenario(name, concurrency, total, one_request, engine) -> dict:
+    latencies, ttfts = [], []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in counter:
+            t0 = time.perf_counter()
+            try:
+                ttft = await one_request(i)
+            except Exception as e:
+                errors += 1
+                if errors <= 3:
+                    print(f"  [{name}] error: {e!r}")
+                continue
+            latencies.append((time.perf_counter() - t0) * 1000)
+            if ttft is not None:
+                ttfts.append((ttft - t0) * 1000)
+
+    with PoolSampler(engine) as sampler:
+        t_start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - t_start
+    return summarize(name, latencies, ttfts, errors, wall, sampler.result())
+
+
+# ─── Scenarios ────────────────────────────────────────────────
+async def main(args: argparse.Namespace) -> dict:
+    import httpx
+    import uvicorn
+    from sqlalchemy import select
+
+    from main import app
+    from app.db.migrations import run_migrations
+    from app.db.session import engine, AsyncSessionLocal
+    from app.core.security import create_access_token
+    from app.models.user import User
+    from app.models.task import Task, MicroWinModel
+
+    await run_migrations(engine)
+    server = uvicorn.Server(uvicorn.Config(app, port=args.port, log_level="warning", lifespan="on"))
+    server_task = asyncio.ensure_future(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    async with AsyncSessionLocal() as db:
+        users = [User(email=f"bench{i}@example.com", granularity_level=3) for i in range(args.users)]
+        db.add_all(users)
+        await db.commit()
+        user_ids = [u.id for u in users]
+    tokens = {uid: create_access_token({"sub": str(uid)}) for uid in user_ids}
+
+    base = f"http://127.0.0.1:{args.port}/api/v1"
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = []
+    goals = [f"Clean and organise room number {i}" for i in range(args.requests)]
+
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=60) as client:
+
+        async def decompose(i: int):
+            user_id = user_ids[i % len(user_ids)]
+            first_step = None
+            async with client.stream(
+                "POST", f"/tasks/decompose/stream?user_id={user_id}", json={"instruction": goals[i]}
+            ) as resp:
+                resp.raise_for_status()
+                async for line in resp.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    event = json.loads(line[6:])
+                    if "error" in event:
+                        raise RuntimeError(event["error"])
+                    if first_step is None and "current_step" in event:
+                        first_step = time.perf_counter()
+            return first_step
+
+        async def list_tasks(i: int):
+            user_id = user_ids[i % len(user_ids)]
+            resp = await client.get(
+                "/tasks/",
+                params={"include_steps": "true"},
+                headers={"Authorization": f"Bearer {tokens[user_id]}"},
+            )
+            resp.raise_for_status()
+
+        task_ids: list = []
+        step_ids: list = []
+
+        async def details(i: int):
+            (await client.get(f"/tasks/{task_ids[i % len(task_ids)]}")).raise_for_status()
+
+        async def complete(i: int):
+            step_id = step_ids[i % len(step_ids)]
+            resp = await client.patch(f"/tasks/microwins/{step_id}", params={"is_completed": "true"})
+            resp.raise_for_status()
+
+        scenarios = {"decompose": decompose, "list": list_tasks, "details": details, "complete": complete}
+        for name in [s.strip() for s in args.scenarios.split(",") if s.strip()]:
+            if name in ("details", "complete") and not task_ids:
+                async with AsyncSessionLocal() as db:
+                    task_ids = list((await db.execute(select(Task.id))).scalars())
+                    step_ids = list((await db.execute(select(MicroWinModel.id))).scalars())
+                random.Random(0).shuffle(step_ids)
+                if not task_ids or not step_ids:
+                    print(f"  [{name}] skipped: run 'decompose' first to create data")
+                    continue
+            print(f"Running {name} x{args.requests} at concurrency {args.concurrency}...")
+            results.append(await run_scenario(name, args.concurrency, args.requests, scenarios[name], engine))
+
+    server.should_exit = True
+    await server_task
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "database": args.database_url.split("://")[0],
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "fake_ttft_ms": args.ttft_ms,
+            "fake_chunk_delay_ms": args.chunk_delay_ms,
+            "cache": args.cache,
+            "db_pool_size": args.pool_size,
+            "db_max_overflow": args.max_overflow,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "scenarios": results,
+    }
+
+
+# ─── Reporting ────────────────────────────────────────────────
+def print_table(report: dict) -> None:
+    header = f"{'scenario':<10} {'ok':>6} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'ttft95':>8} {'pool peak':>10}"
+    print(header)
+    print("-" * len(header))
+    for r in report["scenarios"]:
+        lat = r["latency_ms"]
+        ttft = r.get("ttft_ms", {}).get("p95", "-")
+        pool = f"{r['db_pool']['peak_checked_out']}/{r['db_pool']['capacity']}"
+        print(
+            f"{r['scenario']:<10} {r['requests'] - r['errors']:>6} {r['errors']:>5} {r['throughput_rps']:>8} "
+            f"{lat['p50']:>8} {lat['p95']:>8} {lat['p99']:>8} {ttft:>8} {pool:>10}"
+        )
+
+
+def compare(current: dict, previous: dict, tolerance: float) -> list:
+    """Return human-readable regressions beyond ``tolerance`` (relative)."""
+    regressions = []
+    before = {r["scenario"]: r for r in previous["scenarios"]}
+    for now in current["scenarios"]:
+        old = before.get(now["scenario"])
+        if old is None:
+            continue
+        checks = [("latency p95", now["latency_ms"]["p95"], old["latency_ms"]["p95"], True),
+                  ("latency p99", now["latency_ms"]["p99"], old["latency_ms"]["p99"], True),
+                  ("throughput", now["throughput_rps"], old["throughput_rps"], False)]
+        if "ttft_ms" in now and "ttft_ms" in old:
+            checks.append(("ttft p95", now["ttft_ms"]["p95"], old["ttft_ms"]["p95"], True))
+        for label, new_value, old_value, lower_is_better in checks:
+            if not old_value:
+                continue
+            change = (new_value - old_value) / old_value
+            worse = change > tolerance if lower_is_better else change < -tolerance
+            if worse:
+                regressions.append(f"{now['scenario']}: {label} {old_value} -> {new_value} ({change:+.0%})")
+        if now["errors"] > old["errors"]:
+            regressions.append(f"{now['scenario']}: errors {old['errors']} -> {now['errors']}")
+    return regressions
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    configure_env(args)
+    report = asyncio.run(main(args))
+    print_table(report)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print("\nNo regressions beyond tolerance.")
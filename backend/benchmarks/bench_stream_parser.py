@@ -0,0 +1,81 @@
+"""
+Micro-benchmark: per-chunk parsing cost of the Gemini JSON-lines stream.
+
+Compares the old buffer + re.findall approach with JSONLinesParser while
+the simulated model output grows (more steps, then longer steps).  The
+parser's per-chunk cost should stay flat; the legacy approach rescans the
+whole unconsumed buffer on every chunk and also mis-splits steps that
+contain braces, which shows up in its object count.
+Run from backend/: python benchmarks/bench_stream_parser.py
+"""
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.stream_parser import JSONLinesParser
+
+CHUNK_SIZE = 24
+# (number of steps, characters per step, braces inside step text)
+SCENARIOS = [
+    (50, 40, False), (500, 40, False), (5000, 40, False),
+    (20, 2000, False), (20, 20000, False),
+    (50, 40, True),
+]
+
+
+def _make_chunks(steps: int, step_len: int, braces: bool) -> list:
+    phrase = "pick up {the next} item " if braces else "pick up the next item "
+    filler = (phrase * (step_len // len(phrase) + 1))[:step_len]
+    lines = ["```json", json.dumps({"title": "Clean my room"})]
+    lines += [json.dumps({"action": filler}) for _ in range(steps)]
+    lines += [json.dumps({"status": "end"}), "```"]
+    text = "\n".join(lines)
+    return [text[i:i + CHUNK_SIZE] for i in range(0, len(text), CHUNK_SIZE)]
+
+
+def _legacy(chunks: list) -> int:
+    buffer = ""
+    found = 0
+    for chunk in chunks:
+        buffer += chunk
+        json_objects = re.findall(r'\{[^{}]*\}', buffer)
+        if json_objects:
+            last_match_end = buffer.rfind(json_objects[-1]) + len(json_objects[-1])
+            buffer = buffer[last_match_end:]
+            found += len(json_objects)
+    return found
+
+
+def _incremental(chunks: list) -> int:
+    parser = JSONLinesParser()
+    found = 0
+    for chunk in chunks:
+        found += len(parser.feed(chunk))
+    return found
+
+
+def _per_chunk_us(fn, chunks: list, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(chunks)
+        best = min(best, time.perf_counter() - t0)
+    return best / len(chunks) * 1e6
+
+
+if __name__ == "__main__":
+    print(
+        f"{'steps':>6} {'len':>6} {'braces':>6} {'chunks':>7} {'expected':>9} {'legacy objs':>12} "
+        f"{'parser objs':>12} {'legacy us/chunk':>16} {'parser us/chunk':>16}"
+    )
+    for steps, step_len, braces in SCENARIOS:
+        chunks = _make_chunks(steps, step_len, braces)
+        print(
+            f"{steps:>6} {step_len:>6} {str(braces):>6} {len(chunks):>7} {steps + 2:>9} "
+            f"{_legacy(chunks):>12} {_incremental(chunks):>12} "
+            f"{_per_chunk_us(_legacy, chunks, 1):>16.2f} {_per_chunk_us(_incremental, chunks):>16.2f}"
+        )
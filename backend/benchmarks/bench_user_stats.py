@@ -0,0 +1,144 @@
+"""
+Benchmark: gamification stats reads at a million users.
+
+Seeds --users users (long-tailed total_completed) and a month of
+daily_completions rollup rows for a sample of them into a file SQLite
+database (or DATABASE_URL when --database-url is given), then measures:
+
+  leaderboard cold   one snapshot refresh (top-N + score distribution)
+  leaderboard warm   cached top-N reads
+  user stats         GET /users/{id}/stats work: user row, 7-day rollup, rank/percentile
+  rollup write       record_daily upserts, as done on every step toggle
+
+No micro_wins rows exist at all: none of these paths read them.
+
+Needs aiosqlite (or asyncpg).  Run from backend/:
+    python benchmarks/bench_user_stats.py --users 1000000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--history-users", type=int, default=10_000, help="users given 30 days of rollup rows")
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--database-url", default=None, help="defaults to a fresh SQLite file")
+    return parser.parse_args()
+
+
+def configure_env(args: argparse.Namespace) -> None:
+    """Settings are read at import time, so this must run before importing app.*"""
+    from cryptography.fernet import Fernet
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        path = os.path.join(tempfile.mkdtemp(prefix="microwin-bench-"), "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+    os.environ.setdefault("DB_ENCRYPTION_KEY", Fernet.generate_key().decode())
+
+
+def pct(values: list, p: float) -> float:
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 3) if ordered else 0.0
+
+
+async def seed(args: argparse.Namespace) -> None:
+    from sqlalchemy import insert
+
+    from app.db.session import engine
+    from app.models.stats import DailyCompletion
+    from app.models.user import User
+
+    rng = random.Random(42)
+    today = date.today()
+    batch = 20_000
+    t0 = time.perf_counter()
+    async with engine.begin() as conn:
+        for start in range(1, args.users + 1, batch):
+            rows = []
+            for user_id in range(start, min(start + batch, args.users + 1)):
+                # Long tail: most users have a handful, a few have hundreds
+                total = int(rng.paretovariate(1.2)) - 1
+                rows.append({
+                    "id": user_id,
+                    "email": f"user{user_id}@example.com",
+                    "full_name": f"User {user_id}",
+                    "total_completed": total,
+                    "streak_count": min(total, rng.randint(0, 14)),
+                    "last_completion_date": today - timedelta(days=rng.randint(0, 3)),
+                })
+            await conn.execute(insert(User), rows)
+
+        rows = [
+            {"user_id": user_id, "day": today - timedelta(days=d), "tasks_completed": rng.randint(0, 3),
+             "steps_completed": rng.randint(0, 12)}
+            for user_id in range(1, min(args.history_users, args.users) + 1)
+            for d in range(30)
+        ]
+        for start in range(0, len(rows), batch):
+            await conn.execute(insert(DailyCompletion), rows[start:start + batch])
+    print(f"seeded {args.users:,} users, {len(rows):,} rollup rows in {time.perf_counter() - t0:.1f}s\n")
+
+
+async def main(args: argparse.Namespace) -> None:
+    from app.db.migrations import run_migrations
+    from app.db.session import AsyncSessionLocal, engine
+    from app.models.user import User
+    from app.services.user_stats import daily_history, leaderboard, record_daily
+
+    await run_migrations(engine)
+    await seed(args)
+    rng = random.Random(7)
+
+    t0 = time.perf_counter()
+    await leaderboard.snapshot()
+    print(f"leaderboard cold   {(time.perf_counter() - t0) * 1000:>9.1f} ms  ({leaderboard.stats()})")
+
+    timings = []
+    for _ in range(args.lookups):
+        t0 = time.perf_counter()
+        await leaderboard.top(10)
+        timings.append((time.perf_counter() - t0) * 1000)
+    print(f"leaderboard warm   p50 {pct(timings, 0.5)} ms  p95 {pct(timings, 0.95)} ms")
+
+    timings = []
+    async with AsyncSessionLocal() as db:
+        for _ in range(args.lookups):
+            user_id = rng.randint(1, min(args.history_users, args.users))
+            t0 = time.perf_counter()
+            user = await db.get(User, user_id)
+            await daily_history(db, user_id, 7)
+            await leaderboard.position(user.total_completed)
+            timings.append((time.perf_counter() - t0) * 1000)
+            db.expunge_all()
+    print(f"user stats         p50 {pct(timings, 0.5)} ms  p95 {pct(timings, 0.95)} ms")
+
+    timings = []
+    today = date.today()
+    for _ in range(args.lookups):
+        user_id = rng.randint(1, args.users)
+        t0 = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            await record_daily(db, today, {user_id: (rng.randint(0, 1), 1)})
+            await db.commit()
+        timings.append((time.perf_counter() - t0) * 1000)
+    print(f"rollup write       p50 {pct(timings, 0.5)} ms  p95 {pct(timings, 0.95)} ms")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    configure_env(args)
+    asyncio.run(main(args))
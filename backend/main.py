@@ -1,25 +1,73 @@
+import asyncio
 import os
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.v1.tasks import router as tasks_router
 from app.api.v1.user import router as users_router
 from app.api.v1.auth import router as auth_router
+from app.api.v1.metrics import router as metrics_router
 from app.core.config import settings
+from app.core.readiness import readiness
+from app.core.http_client import get_http_client, close_http_client
+from app.core.static_assets import STATIC_DIR, static_assets
+from app.services.pii_services import pii_scrubber
+from app.services.password_hasher import password_hasher
+from app.services.llm_provider import llm_provider
+from app.services import progress_reconciler, step_writer
 
 # IMPORT MODELS HERE TO REGISTER THEM WITH SQLALCHEMY
 from app.models.task import Task
 from app.models.user import User
+from app.models.stats import DailyCompletion
+
+from app.db.session import engine
+
+async def _warm_phase(name: str, coro) -> None:
+    """Run one warm-up step and record it for the readiness probe."""
+    try:
+        await coro
+    except Exception as e:
+        print(f"Warm-up '{name}' failed: {e}")
+        readiness.finish(name, error=e)
+    else:
+        readiness.finish(name)
 
-from app.db.session import engine, Base
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Auto-create tables on startup (safe: create_all is a no-op if tables exist)
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # Schema changes are applied by `python migrate.py` before the server starts.
+
+    # One pooled keep-alive client for outbound calls (Google sign-in)
+    get_http_client()
+
+    # Built frontend: read and precompress once, serve from memory
+    if os.path.isdir(STATIC_DIR):
+        await asyncio.to_thread(static_assets.load)
+
+    # Warm the hot path in the background: /api/v1/tasks/health answers right
+    # away (liveness), /api/v1/tasks/ready only once these have finished.
+    readiness.start("pii_model")
+    readiness.start("llm_provider")
+    warm_tasks = [
+        asyncio.create_task(_warm_phase("pii_model", pii_scrubber.warm_up())),
+        asyncio.create_task(_warm_phase("llm_provider", asyncio.to_thread(llm_provider.warm_up))),
+    ]
+    background = []
+    if settings.PROGRESS_RECONCILE_INTERVAL_SECONDS > 0:
+        background.append(asyncio.create_task(
+            progress_reconciler.run_periodically(settings.PROGRESS_RECONCILE_INTERVAL_SECONDS)
+        ))
     yield
+    for task in warm_tasks + background:
+        task.cancel()
+    # Let write-behind step writes from finished streams land
+    await step_writer.drain()
+    pii_scrubber.shutdown()
+    password_hasher.shutdown()
+    await close_http_client()
+    await engine.dispose()
 
 app = FastAPI(title="MicroWin API", lifespan=lifespan)
 
@@ -40,23 +88,17 @@ app.add_middleware(
 app.include_router(auth_router, prefix="/api/v1/auth", tags=["auth"])
 app.include_router(tasks_router, prefix="/api/v1/tasks", tags=["tasks"])
 app.include_router(users_router, prefix="/api/v1/users", tags=["users"])
+app.include_router(metrics_router, prefix="/api/v1/metrics", tags=["metrics"])
 
 # ─── Serve Frontend in Production (Docker) ────────────────
-STATIC_DIR = os.path.join(os.path.dirname(__file__), "static")
 if os.path.isdir(STATIC_DIR):
-    from fastapi.staticfiles import StaticFiles
-    from fastapi.responses import FileResponse
-
     @app.get("/assets/{rest_of_path:path}")
-    async def serve_assets(rest_of_path: str):
-        return FileResponse(os.path.join(STATIC_DIR, "assets", rest_of_path))
+    async def serve_assets(rest_of_path: str, request: Request):
+        return static_assets.serve_asset(rest_of_path, request)
 
     @app.get("/{full_path:path}")
-    async def serve_spa(full_path: str):
-        file_path = os.path.join(STATIC_DIR, full_path)
-        if os.path.isfile(file_path):
-            return FileResponse(file_path)
-        return FileResponse(os.path.join(STATIC_DIR, "index.html"))
+    async def serve_spa(full_path: str, request: Request):
+        return static_assets.serve_spa(full_path, request)
 else:
     @app.get("/")
     def read_root():
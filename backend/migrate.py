@@ -0,0 +1,47 @@
+"""
+Schema migrations (see app/db/migrations).
+Run before starting the app:
+
+    python migrate.py                # apply all pending migrations
+    python migrate.py --status       # list applied and pending versions
+    python migrate.py --check-plans  # EXPLAIN the hot queries, non-zero exit if an index is not used
+"""
+import argparse
+import asyncio
+import sys
+
+from app.db.session import engine
+from app.db.migrations import applied_versions, load_migrations, run_migrations
+from app.db.plan_check import check_plans
+
+
+async def main(args: argparse.Namespace) -> int:
+    try:
+        if args.status:
+            done = set(await applied_versions(engine))
+            for migration in load_migrations():
+                mark = "applied" if migration.VERSION in done else "pending"
+                print(f"{migration.VERSION:>4}  {mark:<8} {migration.DESCRIPTION}")
+            return 0
+
+        if args.check_plans:
+            problems = await check_plans(engine)
+            for problem in problems:
+                print(f"❌ {problem}\n")
+            if not problems:
+                print("✅ All hot queries use their indexes.")
+            return 1 if problems else 0
+
+        applied = await run_migrations(engine, target=args.target)
+        print(f"✅ Migrations complete ({len(applied)} applied).")
+        return 0
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MicroWin schema migrations")
+    parser.add_argument("--status", action="store_true")
+    parser.add_argument("--check-plans", action="store_true")
+    parser.add_argument("--target", type=int, default=None, help="stop after this version")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,29 @@
+"""
+Repair drift in the per-task progress counters (see app/services/progress_reconciler.py).
+Safe to run against a live database, e.g. nightly from cron:
+
+    python reconcile_progress.py
+    python reconcile_progress.py --batch-size 5000
+"""
+import argparse
+import asyncio
+import sys
+
+from app.core.config import settings
+from app.db.session import engine
+from app.services.progress_reconciler import reconcile_progress
+
+
+async def main(args: argparse.Namespace) -> int:
+    try:
+        result = await reconcile_progress(batch_size=args.batch_size)
+        print(f"✅ Checked {result['checked']} task(s), repaired {result['repaired']} in {result['seconds']}s.")
+        return 0
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MicroWin progress counter reconciliation")
+    parser.add_argument("--batch-size", type=int, default=settings.PROGRESS_RECONCILE_BATCH_SIZE)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -9,11 +9,12 @@ import json
 import sys
 
 BASE_URL = "http://localhost:8000"
+USER_ID = 1  # Any existing user id
 
 def test_decompose_stream():
     """Test the streaming decompose endpoint"""
     print("\n" + "="*50)
-    print("Testing POST /api/v1/decompose/stream")
+    print("Testing POST /api/v1/tasks/decompose/stream")
     print("="*50)
     
     # Test payload
@@ -26,7 +27,8 @@ def test_decompose_stream():
     try:
         # Use stream=True to handle streaming response
         response = requests.post(
-            f"{BASE_URL}/api/v1/decompose/stream",
+            f"{BASE_URL}/api/v1/tasks/decompose/stream",
+            params={"user_id": USER_ID},
             json=payload,
             stream=True,
             timeout=30
@@ -51,7 +53,11 @@ def test_decompose_stream():
                         # Extract and parse JSON
                         json_str = line.replace("data: ", "").strip()
                         try:
-                            step_data = json.loads(json_str)
+                            event = json.loads(json_str)
+                            if "current_step" not in event:
+                                print(f"   Event: {event}")
+                                continue
+                            step_data = event["current_step"]
                             step_count += 1
                             print(f"\n Step {step_count}:")
                             print(f"   - ID: {step_data.get('step_id')}")
@@ -87,7 +93,8 @@ def test_validation():
     # Test with too short instruction
     print("\n1️⃣  Testing with instruction too short (< 5 chars):")
     response = requests.post(
-        f"{BASE_URL}/api/v1/decompose/stream",
+        f"{BASE_URL}/api/v1/tasks/decompose/stream",
+        params={"user_id": USER_ID},
         json={"instruction": "hi"},
         timeout=10
     )
@@ -100,7 +107,8 @@ def test_validation():
     # Test with too long instruction
     print("\n2️⃣  Testing with instruction too long (> 500 chars):")
     response = requests.post(
-        f"{BASE_URL}/api/v1/decompose/stream",
+        f"{BASE_URL}/api/v1/tasks/decompose/stream",
+        params={"user_id": USER_ID},
         json={"instruction": "a" * 501},
         timeout=10
     )